@@ -0,0 +1,2 @@
+# Benchmarks of the crypto and bitcoin hot paths, run with:
+# PYTHONPATH=src python3 -m benchmark --help
@@ -0,0 +1,84 @@
+# Simple Wallet
+# Copyright (c) 2023 Arctic Technology
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# Runs the benchmarks and optionally compares them with a baseline:
+#   PYTHONPATH=src python3 -m benchmark --output baseline.json
+#   PYTHONPATH=src python3 -m benchmark --baseline baseline.json --threshold 0.1
+# The exit status is 1 if any benchmark regressed past the threshold.
+
+import argparse
+import sys
+from .runner import Runner
+
+def _parse_sizes(text: str) -> list:
+	sizes = []
+	for item in text.split(','):
+		item = item.strip().lower()
+		if item == '': continue
+		scale = 1
+		if item.endswith('k'): item, scale = item[:-1], 1000
+		elif item.endswith('m'): item, scale = item[:-1], 1000000
+		sizes.append(int(item) * scale)
+	return sizes
+
+def main(argv: list = None) -> int:
+	parser = argparse.ArgumentParser(prog='python3 -m benchmark', description='Benchmark the SimpleWallet hot paths.')
+	parser.add_argument('--suite', choices=['micro', 'macro', 'all'], default='all')
+	parser.add_argument('--filter', default='', help='Only run benchmarks whose name contains this text.')
+	parser.add_argument('--sizes', default='1k', help='Macro fixture sizes, e.g. 1k,100k,1m.')
+	parser.add_argument('--workers', type=int, default=1, help='Workers of the bulk paths.')
+	parser.add_argument('--repeat', type=int, default=5, help='Timed runs per benchmark, the median is kept.')
+	parser.add_argument('--fixtures', default='.benchmark', help='Directory of the generated fixture files.')
+	parser.add_argument('--output', help='Write the results as JSON to this file.')
+	parser.add_argument('--baseline', help='JSON results to compare with.')
+	parser.add_argument('--threshold', type=float, default=0.1, help='Allowed slowdown against the baseline, 0.1 is 10%%.')
+	args = parser.parse_args(argv)
+
+	entries = []
+	if args.suite in ('micro', 'all'):
+		from .micro import MICRO
+		for name, setup, number, rows in MICRO:
+			if args.filter in name: entries.append((name, setup, number, args.repeat, rows))
+	if args.suite in ('macro', 'all'):
+		from .macro import macro
+		for name, func, number, repeat, rows in macro(args.fixtures, _parse_sizes(args.sizes), args.workers, min(args.repeat, 3)):
+			if args.filter in name: entries.append((name, lambda func=func: func, number, repeat, rows))
+
+	results = []
+	for name, setup, number, repeat, rows in entries:
+		result = Runner.measure(name, setup(), number, repeat, rows)
+		results.append(result)
+		print('{:<40} {:>12} per row'.format(name, Runner.format_seconds(result['seconds'])), flush=True)
+
+	if args.output != None: Runner.save(results, args.output)
+	if args.baseline == None: return 0
+
+	comparison = Runner.compare(results, Runner.load(args.baseline), args.threshold)
+	regressed = [row for row in comparison if row['regressed']]
+	print('')
+	for row in comparison:
+		print('{:<40} {:>12} -> {:>12} {:+.1%}{}'.format(row['name'], Runner.format_seconds(row['baseline']),
+			Runner.format_seconds(row['seconds']), row['ratio'] - 1, '  REGRESSED' if row['regressed'] else ''))
+	print('\n{} of {} benchmarks regressed by more than {:.0%}.'.format(len(regressed), len(comparison), args.threshold))
+	return 1 if len(regressed) > 0 else 0
+
+if __name__ == "__main__":
+	sys.exit(main())
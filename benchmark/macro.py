@@ -0,0 +1,112 @@
+# Simple Wallet
+# Copyright (c) 2023 Arctic Technology
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# Macro benchmarks of the bulk csv paths over generated fixture files. The
+# fixtures are written once per size into the fixtures directory and
+# reused by later runs, the output of every timed run is removed again.
+
+import os
+from simplewallet.bitcoin.helper import cached_magic_hd
+from simplewallet.bitcoin.signer import Signer
+from simplewallet.dircrawler.datamodder import DataModder
+from simplewallet.simplewallet import SimpleWallet, _batches, _wallet_rows
+
+def _remove_output(result: dict):
+	# Removes the file named by a 'File created: <path>' result.
+	message = result.get('message') or ''
+	if result.get('status') == 200 and message.startswith('File created: '):
+		outpath = message[len('File created: '):]
+		if os.path.exists(outpath): os.remove(outpath)
+	elif result.get('status') != 200:
+		raise Exception(message)
+
+def _wallet_fixture(fixtures: str, size: int) -> str:
+	# address,privkey,message rows, a distinct message per row.
+	outpath = os.path.join(fixtures, 'sign-{}.csv'.format(size))
+	if os.path.exists(outpath): return outpath
+	def rows():
+		index = 0
+		for num in _batches(size, 1000):
+			for address, privkey in _wallet_rows((('p2wpkh',), num)):
+				yield [address, privkey, 'benchmark message {}'.format(index)]
+				index += 1
+	result = DataModder.stream_createcsv(['address', 'privkey', 'message'], rows(), outpath + '.tmp')
+	if result['status'] != 200: raise Exception(result['message'])
+	os.replace(outpath + '.tmp', outpath)
+	return outpath
+
+def _signed_fixture(fixtures: str, size: int) -> str:
+	# The wallet fixture with a signature column, for verify_bulk.
+	outpath = os.path.join(fixtures, 'verify-{}.csv'.format(size))
+	if os.path.exists(outpath): return outpath
+	inpath = _wallet_fixture(fixtures, size)
+	rows = ([row['address'], row['privkey'], row['message'],
+			Signer.sign_message(row['privkey'], row['message'], algo=cached_magic_hd)['signature']]
+			for row in DataModder.readcols(inpath, ['address', 'privkey', 'message']))
+	result = DataModder.stream_createcsv(['address', 'privkey', 'message', 'signature'], rows, outpath + '.tmp')
+	if result['status'] != 200: raise Exception(result['message'])
+	os.replace(outpath + '.tmp', outpath)
+	return outpath
+
+def macro(fixtures: str, sizes: list, workers: int = 1, repeat: int = 3) -> list:
+	# Returns (name, func, number, repeat, rows) entries. get_wallet is
+	# capped at 1000 rows, larger wallets are timed with generate_bulk.
+	simplewallet = SimpleWallet()
+	os.makedirs(fixtures, exist_ok=True)
+	entries = []
+
+	def get_wallet():
+		cwd = os.getcwd()
+		os.chdir(fixtures)
+		try:
+			_remove_output(simplewallet.get_wallet(1000, 'all'))
+		finally:
+			os.chdir(cwd)
+	entries.append(('macro.get_wallet.1000', get_wallet, 1, repeat, 1000))
+
+	for size in sizes:
+		# Large files are run once, a single run already averages over
+		# enough rows.
+		runs = repeat if size <= 10000 else 1
+		signpath = _wallet_fixture(fixtures, size)
+		verifypath = _signed_fixture(fixtures, size)
+		outpath = os.path.join(fixtures, 'generate-{}.csv'.format(size))
+
+		def generate_bulk(size=size, outpath=outpath):
+			if os.path.exists(outpath): os.remove(outpath)
+			result = simplewallet.generate_bulk(size, 'all', outpath, workers=workers)
+			os.remove(outpath)
+			if result['status'] != 200: raise Exception(result['message'])
+		def sign_bulk(signpath=signpath):
+			_remove_output(simplewallet.sign_bulk(signpath, workers=workers))
+		def sign_bulk_shared(signpath=signpath):
+			_remove_output(simplewallet.sign_bulk(signpath, 'benchmark message', workers=workers))
+		def verify_bulk(verifypath=verifypath):
+			_remove_output(simplewallet.verify_bulk(verifypath, 'signature', workers=workers))
+		def verify_bulk_privkey(verifypath=verifypath):
+			_remove_output(simplewallet.verify_bulk(verifypath, 'privkey', workers=workers))
+
+		entries.append(('macro.generate_bulk.{}'.format(size), generate_bulk, 1, runs, size))
+		entries.append(('macro.sign_bulk.{}'.format(size), sign_bulk, 1, runs, size))
+		entries.append(('macro.sign_bulk_shared.{}'.format(size), sign_bulk_shared, 1, runs, size))
+		entries.append(('macro.verify_bulk.{}'.format(size), verify_bulk, 1, runs, size))
+		entries.append(('macro.verify_bulk_privkey.{}'.format(size), verify_bulk_privkey, 1, runs, size))
+	return entries
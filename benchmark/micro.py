@@ -0,0 +1,122 @@
+# Simple Wallet
+# Copyright (c) 2023 Arctic Technology
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# Micro benchmarks, one per primitive. Every entry is (name, setup, number,
+# rows) where setup builds its inputs outside of the timing and returns the
+# function to time, and rows is the number of items one call handles.
+
+import os
+from simplewallet.bitcoin.address import Address
+from simplewallet.bitcoin.helper import magic_hd
+from simplewallet.bitcoin.privkey import Privkey
+from simplewallet.bitcoin.pubkey import Pubkey
+from simplewallet.bitcoin.signer import Signer
+from simplewallet.bitcoin.verifier import Verifier
+from simplewallet.crypto.base import Base
+from simplewallet.crypto.bech32 import Bech32
+from simplewallet.crypto.hash160 import Hash160
+from simplewallet.crypto.ripemd import Ripemd
+from simplewallet.crypto.sha256 import Sha256
+
+PRIVKEY = 'KxL45a866ZnetmhpU2oBQbVv7ZwnJBsBCEMMWusfb24YdvKYFbBJ'
+MESSAGE = 'hello world message'
+BATCH = 1000
+
+def _base_encode():
+	v = os.urandom(25)
+	return lambda: Base.encode(v, base=58)
+
+def _base_decode():
+	v = Base.encode(os.urandom(25), base=58)
+	return lambda: Base.decode(v, base=58)
+
+def _base_encode_check_many():
+	payloads = os.urandom(21 * BATCH)
+	return lambda: Base.encode_check_many(payloads, BATCH, 21)
+
+def _bech32_encode():
+	data = [0] + [x & 31 for x in os.urandom(32)]
+	return lambda: Bech32.encode('bc', data)
+
+def _sha256_hash():
+	x = os.urandom(33)
+	return lambda: Sha256.hash(x)
+
+def _ripemd_hash():
+	x = os.urandom(32)
+	return lambda: Ripemd.hash(x)
+
+def _hash160_hash():
+	x = os.urandom(33)
+	return lambda: Hash160.hash(x)
+
+def _hash160_hash_many():
+	buffer = os.urandom(33 * BATCH)
+	return lambda: Hash160.hash_many(buffer, BATCH, 33)
+
+def _privkey_deserialize():
+	return lambda: Privkey.deserialize(PRIVKEY)
+
+def _pubkey_from_secretkey():
+	secretkey = Privkey.generate_secretkey()
+	return lambda: Pubkey.from_secretkey(secretkey)
+
+def _address_from_privkey():
+	return lambda: Address.from_privkey(PRIVKEY, 'p2wpkh')
+
+def _address_secretkey_to_hash160_many():
+	secretkeys = b''.join(Privkey.generate_secretkey() for _ in range(BATCH))
+	return lambda: Address.secretkey_to_hash160_many(secretkeys, BATCH)
+
+def _magic_hd():
+	message = MESSAGE.encode('utf8')
+	return lambda: magic_hd(message)
+
+def _signer_sign_message():
+	return lambda: Signer.sign_message(PRIVKEY, MESSAGE)
+
+def _verifier_with_signature():
+	address = Address.from_privkey(PRIVKEY, 'p2wpkh')
+	signature = Signer.sign_message(PRIVKEY, MESSAGE)['signature']
+	return lambda: Verifier.with_signature(address, signature, MESSAGE)
+
+def _verifier_with_privkey():
+	address = Address.from_privkey(PRIVKEY, 'p2wpkh')
+	return lambda: Verifier.with_privkey(address, PRIVKEY)
+
+MICRO = [
+	('base.encode', _base_encode, 2000, 1),
+	('base.decode', _base_decode, 2000, 1),
+	('base.encode_check_many', _base_encode_check_many, 5, BATCH),
+	('bech32.encode', _bech32_encode, 2000, 1),
+	('sha256.hash', _sha256_hash, 20000, 1),
+	('ripemd.hash', _ripemd_hash, 5000, 1),
+	('hash160.hash', _hash160_hash, 5000, 1),
+	('hash160.hash_many', _hash160_hash_many, 5, BATCH),
+	('privkey.deserialize', _privkey_deserialize, 2000, 1),
+	('pubkey.from_secretkey', _pubkey_from_secretkey, 2000, 1),
+	('address.from_privkey', _address_from_privkey, 1000, 1),
+	('address.secretkey_to_hash160_many', _address_secretkey_to_hash160_many, 2, BATCH),
+	('helper.magic_hd', _magic_hd, 20000, 1),
+	('signer.sign_message', _signer_sign_message, 500, 1),
+	('verifier.with_signature', _verifier_with_signature, 500, 1),
+	('verifier.with_privkey', _verifier_with_privkey, 500, 1),
+]
@@ -0,0 +1,87 @@
+# Simple Wallet
+# Copyright (c) 2023 Arctic Technology
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import json
+import os
+import platform
+import statistics
+import time
+from typing import Callable, List
+
+class Runner:
+
+	@classmethod
+	def measure(self, name: str, func: Callable, number: int, repeat: int = 5, rows: int = 1) -> dict:
+		# Times repeat runs of func called number times. seconds is the median
+		# time of one call per row, so results of different sizes compare.
+		# One untimed call first pays the one-off costs, such as the lazy
+		# numpy import and the Ripemd backend calibration, so a result does
+		# not depend on which benchmarks ran before it.
+		func()
+		times = []
+		for _ in range(max(1, repeat)):
+			start = time.perf_counter()
+			for _ in range(number): func()
+			times.append((time.perf_counter() - start) / number)
+		return {'name': name, 'number': number, 'repeat': len(times), 'rows': rows,
+				'seconds': statistics.median(times) / rows, 'best': min(times) / rows}
+
+	@classmethod
+	def environment(self) -> dict:
+		from simplewallet.crypto.ripemd import Ripemd
+		from simplewallet.utils.optional import optional_import
+		return {'python': platform.python_version(), 'implementation': platform.python_implementation(),
+				'machine': platform.machine(), 'system': platform.system(), 'cpus': os.cpu_count(),
+				'numpy': optional_import('numpy') != None, 'ripemd': Ripemd.backend(), 'time': int(time.time())}
+
+	@classmethod
+	def save(self, results: List[dict], outpath: str) -> dict:
+		report = {'environment': self.environment(), 'results': {r['name']: r for r in results}}
+		with open(outpath, 'w') as f:
+			json.dump(report, f, indent=1, sort_keys=True)
+		return report
+
+	@classmethod
+	def load(self, filepath: str) -> dict:
+		with open(filepath, 'r') as f:
+			return json.load(f)
+
+	@classmethod
+	def compare(self, results: List[dict], baseline: dict, threshold: float) -> List[dict]:
+		# Compares the per row seconds of every result with the baseline. A
+		# result is a regression when it is slower than the baseline by more
+		# than threshold, e.g. 0.1 for 10%. Results missing from either side
+		# are skipped.
+		rows = []
+		previous = baseline.get('results', {})
+		for result in results:
+			if result['name'] not in previous: continue
+			before = previous[result['name']]['seconds']
+			ratio = result['seconds'] / before if before > 0 else 1.0
+			rows.append({'name': result['name'], 'baseline': before, 'seconds': result['seconds'],
+						'ratio': ratio, 'regressed': ratio > 1 + threshold})
+		return rows
+
+	@classmethod
+	def format_seconds(self, seconds: float) -> str:
+		for unit, scale in (('s', 1), ('ms', 1e3), ('us', 1e6)):
+			if seconds * scale >= 1: return '{:.2f} {}'.format(seconds * scale, unit)
+		return '{:.0f} ns'.format(seconds * 1e9)
@@ -1,20 +1,30 @@
 # This exports package resources so that anyone can use in their own projects.
+# Resources are imported on first use (PEP 562), so importing the package
+# does not load the GUI, the bitcoin modules or libsecp256k1 until needed.
+import importlib
+
+_modules = {
+	'SimpleWallet': '.simplewallet', 'SimpleWalletGUI': '.simplewallet', 'AsyncSimpleWallet': '.asyncwallet',
+	'Address': '.bitcoin.address', 'AddressIndex': '.bitcoin.addressindex', 'Privkey': '.bitcoin.privkey',
+	'Pubkey': '.bitcoin.pubkey', 'Signer': '.bitcoin.signer', 'Verifier': '.bitcoin.verifier',
+	'Instance': '.gui.instance', 'AddressGui': '.gui.addressgui', 'SignerGui': '.gui.signergui',
+	'VerifierGui': '.gui.verifiergui', 'ConfigLoader': '.utils.configloader', 'Stats': '.utils.stats'
+}
+
 __all__ = [
-	'SimpleWallet', 'SimpleWalletGUI',
-	'Address', 'Privkey', 'Pubkey',
+	'SimpleWallet', 'SimpleWalletGUI', 'AsyncSimpleWallet',
+	'Address', 'AddressIndex', 'Privkey', 'Pubkey',
 	'Signer', 'Verifier', 'Instance',
 	'AddressGui', 'SignerGui', 'VerifierGui',
-	'ConfigLoader'
+	'ConfigLoader', 'Stats'
 ]
 
-from .simplewallet import *
-from .bitcoin.address import *
-from .bitcoin.privkey import *
-from .bitcoin.pubkey import *
-from .bitcoin.signer import *
-from .bitcoin.verifier import *
-from .gui.instance import *
-from .gui.addressgui import *
-from .gui.signergui import *
-from .gui.verifiergui import *
-from .utils.configloader import *
+def __getattr__(name: str):
+	if name not in _modules:
+		raise AttributeError('module {!r} has no attribute {!r}'.format(__name__, name))
+	value = getattr(importlib.import_module(_modules[name], __name__), name)
+	globals()[name] = value
+	return value
+
+def __dir__() -> list:
+	return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,112 @@
+# Simple Wallet
+# Copyright (c) 2023 Arctic Technology
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+from .simplewallet import SimpleWallet
+
+class BulkCancelled(Exception):
+	pass
+
+class AsyncSimpleWallet:
+
+	def __init__(self, simplewallet: SimpleWallet = None, max_workers: int = 4, max_pending: int = 64):
+		# Awaitable SimpleWallet. Calls run on a pool of max_workers threads,
+		# so the EC work stays off the event loop, and at most max_pending
+		# calls are admitted at a time: further callers wait for a slot
+		# instead of piling up in the executor queue.
+		self.simplewallet = simplewallet if simplewallet != None else SimpleWallet()
+		self.max_workers = max_workers
+		self.max_pending = max(max_pending, max_workers)
+		self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='simplewallet')
+		self._slots = None
+
+	async def __aenter__(self):
+		return self
+
+	async def __aexit__(self, *exc):
+		self.close()
+
+	def close(self, wait: bool = True):
+		self._executor.shutdown(wait=wait)
+
+	def _get_slots(self) -> asyncio.Semaphore:
+		# Created on first use so that it belongs to the running loop.
+		if self._slots == None: self._slots = asyncio.Semaphore(self.max_pending)
+		return self._slots
+
+	async def _run(self, func: Callable, *args, **kwargs):
+		async with self._get_slots():
+			loop = asyncio.get_running_loop()
+			return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+
+	async def _run_bulk(self, func: Callable, *args, progress: Callable[[int], None] = None, **kwargs) -> dict:
+		# Runs a bulk job that can be cancelled. Cancelling the awaiting task
+		# stops the job at its next progress report: a sign or verify output
+		# is removed, a generate_bulk file is left to be resumed. The task
+		# only finishes once the job has stopped.
+		cancelled = threading.Event()
+
+		def report(count: int):
+			if cancelled.is_set(): raise BulkCancelled()
+			if progress != None: progress(count)
+
+		async with self._get_slots():
+			loop = asyncio.get_running_loop()
+			future = loop.run_in_executor(self._executor, functools.partial(func, *args, progress=report, **kwargs))
+			try:
+				return await asyncio.shield(future)
+			except asyncio.CancelledError:
+				cancelled.set()
+				try:
+					await future
+				except Exception:
+					pass
+				raise
+
+	async def get_wallet(self, num: int = 0, mode: str = 'p2wpkh') -> dict:
+		return await self._run(self.simplewallet.get_wallet, num, mode)
+
+	async def sign_message(self, privkey: str, message: str, mode: str) -> dict:
+		return await self._run(self.simplewallet.sign_message, privkey, message, mode)
+
+	async def verify_visual(self, instructions: dict, mode: str) -> dict:
+		return await self._run(self.simplewallet.verify_visual, instructions, mode)
+
+	async def find_bulk(self, filepath: str, instructions: dict) -> dict:
+		return await self._run(self.simplewallet.find_bulk, filepath, instructions)
+
+	async def generate_bulk(self, num: int, mode: str = 'p2wpkh', outpath: str = None,
+							progress: Callable[[int], None] = None, **kwargs) -> dict:
+		# kwargs are passed on to SimpleWallet.generate_bulk, as for the
+		# other bulk operations.
+		return await self._run_bulk(self.simplewallet.generate_bulk, num, mode, outpath, progress=progress, **kwargs)
+
+	async def sign_bulk(self, filepath: str, message: str = None,
+						progress: Callable[[int], None] = None, **kwargs) -> dict:
+		return await self._run_bulk(self.simplewallet.sign_bulk, filepath, message, progress=progress, **kwargs)
+
+	async def verify_bulk(self, filepath: str, method: str = 'signature', message: str = None,
+						progress: Callable[[int], None] = None, **kwargs) -> dict:
+		return await self._run_bulk(self.simplewallet.verify_bulk, filepath, method, message, progress=progress, **kwargs)
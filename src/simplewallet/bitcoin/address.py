@@ -19,35 +19,108 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
+from itertools import count
+from typing import NamedTuple, Optional, Tuple
 from .helper import BitcoinMainnet
 from .privkey import Privkey
 from .pubkey import Pubkey
+from ..crypto.base import Base
 from ..crypto.bech32 import Bech32
 from ..crypto.hash160 import Hash160
+from ..crypto.sha256 import Sha256
 from ..utils.conversion import powbase2
 
+class AddressRecord(NamedTuple):
+	# A decoded address: its txin, the NET_NAME of its network and its hash160.
+	txin: str
+	net: str
+	hash160: bytes
+
 class Address:
 
 	@classmethod
 	def from_privkey(self, privkey: str, txin: str, *, net=None) -> str:
 		# Gets address from privkey
 		if net == None: net = BitcoinMainnet
+		return Address.from_hash160(Address.privkey_to_hash160(privkey), txin, net=net)
+
+	@classmethod
+	def privkey_to_hash160(self, privkey: str) -> bytes:
+		# Gets the hash160 of the pubkey of privkey, shared by every txin.
 		secretkey, compressed = Privkey.deserialize(privkey)
 		pubkey = Pubkey.from_secretkey(secretkey)
-		pubkeybytes = pubkey.get_public_key_bytes(compressed=compressed)
-		return Address.from_pubkey(pubkeybytes, txin, net=net)
+		return Hash160.hash(pubkey.get_public_key_bytes(compressed=compressed))
+
+	@classmethod
+	def from_secretkey(self, secretkey: bytes, txins: tuple, *, compressed: bool = True, net=None) -> dict:
+		# Gets {txin: address} from secretkey, deriving the pubkey and its
+		# hash160 once and encoding it for every requested txin.
+		if net == None: net = BitcoinMainnet
+		h160 = Address.secretkey_to_hash160(secretkey, compressed=compressed)
+		return {txin: Address.from_hash160(h160, txin, net=net) for txin in txins}
+
+	@classmethod
+	def secretkey_to_hash160(self, secretkey: bytes, *, compressed: bool = True) -> bytes:
+		# Gets the hash160 of the pubkey of secretkey.
+		pubkey = Pubkey.from_secretkey(secretkey)
+		return Hash160.hash(pubkey.get_public_key_bytes(compressed=compressed))
+
+	@classmethod
+	def secretkey_to_hash160_many(self, secretkeys: bytes, num: int, *, compressed: bool = True) -> bytes:
+		# Gets the hash160s of num secretkeys packed in secretkeys, packed
+		# 20 bytes each. The pubkeys are hashed as one Hash160.hash_many batch.
+		keylen = 33 if compressed else 65
+		pubkeys = b''.join(Pubkey.from_secretkey(secretkeys[i*32:(i+1)*32]).get_public_key_bytes(compressed=compressed)
+						for i in range(num))
+		return Hash160.hash_many(pubkeys, num, keylen)
 
 	@classmethod
 	def from_pubkey(self, pubkeybytes: bytes, txin: str, *, net=None) -> str:
 		# Gets address from pubkey
 		if net == None: net = BitcoinMainnet
+		return Address.from_hash160(Hash160.hash(pubkeybytes), txin, net=net)
+
+	@classmethod
+	def from_hash160(self, h160: bytes, txin: str, *, net=None) -> str:
+		# Gets address from hash160 of pubkey
+		if net == None: net = BitcoinMainnet
 		if txin == 'p2pkh':
-			return P2pkh.public_key_to_p2pkh(pubkeybytes, net=net)
+			return P2pkh.hash160_to_p2pkh(h160, net=net)
 		elif txin == 'p2wpkh':
-			return P2wpkh.public_key_to_p2wpkh(pubkeybytes, net=net)
+			return P2wpkh.hash160_to_segwit_addr(h160, witver=0, net=net)
 		else:
 			raise NotImplementedError(txin)
 
+	@classmethod
+	def from_hash160_many(self, h160s: bytes, num: int, txin: str, *, net=None) -> list:
+		# Gets the addresses of num hash160s packed in h160s, p2pkh
+		# addresses are Base58Check encoded as one batch.
+		if net == None: net = BitcoinMainnet
+		if txin == 'p2pkh':
+			return P2pkh.hash160_to_p2pkh_many(h160s, num, net=net)
+		return [Address.from_hash160(h160s[i*20:(i+1)*20], txin, net=net) for i in range(num)]
+
+	@classmethod
+	def to_hash160(self, address: str, *, net=None) -> Tuple[Optional[str], Optional[bytes]]:
+		# Decodes address to (txin, hash160), or (None, None) if the address
+		# is not a valid p2pkh or p2wpkh address, or not a str at all, like
+		# the None of a missing csv cell.
+		if not isinstance(address, str): return None, None
+		if net == None: net = BitcoinMainnet
+		h160 = P2wpkh.segwit_addr_to_hash160(address, net=net)
+		if h160 is not None: return 'p2wpkh', h160
+		h160 = P2pkh.p2pkh_to_hash160(address, net=net)
+		if h160 is not None: return 'p2pkh', h160
+		return None, None
+
+	@classmethod
+	def parse(self, address: str, *, net=None) -> Optional[AddressRecord]:
+		# Decodes address to an AddressRecord, or None if it is invalid.
+		if net == None: net = BitcoinMainnet
+		txin, h160 = Address.to_hash160(address, net=net)
+		if txin is None: return None
+		return AddressRecord(txin, net.NET_NAME, h160)
+
 class P2pkh:
 
 	@classmethod
@@ -55,6 +128,23 @@ class P2pkh:
 		if net == None: net = BitcoinMainnet
 		return Hash160.hash160_to_b58_address(h160, net.ADDRTYPE_P2PKH)
 
+	@classmethod
+	def hash160_to_p2pkh_many(self, h160s: bytes, num: int, *, net=None) -> list:
+		if net == None: net = BitcoinMainnet
+		return Hash160.hash160_to_b58_address_many(h160s, num, net.ADDRTYPE_P2PKH)
+
+	@classmethod
+	def p2pkh_to_hash160(self, address: str, *, net=None) -> Optional[bytes]:
+		# Returns the hash160 of a p2pkh address, or None if it is invalid.
+		if net == None: net = BitcoinMainnet
+		try:
+			vch = Base.decode(address, base=58, length=25)
+		except:
+			return None
+		if vch is None or vch[0] != net.ADDRTYPE_P2PKH: return None
+		if Sha256.hashd(vch[0:21])[0:4] != vch[21:25]: return None
+		return vch[1:21]
+
 	@classmethod
 	def public_key_to_p2pkh(self, public_key: bytes, *, net=None) -> str:
 		if net == None: net = BitcoinMainnet
@@ -62,11 +152,23 @@ class P2pkh:
 
 class P2wpkh:
 
+	# Every SELF_CHECK-th encoded address is decoded again as a self check,
+	# 1 checks every address and 0 turns the check off.
+	SELF_CHECK = 1
+	__encoded = count()
+
+	@classmethod
+	def set_self_check(self, every: int):
+		# Sets how often _segwit_encode round trips its result.
+		self.SELF_CHECK = max(0, int(every))
+
 	@classmethod
 	def _segwit_encode(self, hrp, witver, witprog):
 		# Encode a segwit address.
 		ret = Bech32.encode(hrp, [witver] + powbase2(witprog, 8, 5))
-		assert self._segwit_decode(hrp, ret) != (None, None)
+		if self.SELF_CHECK and next(self.__encoded) % self.SELF_CHECK == 0:
+			if self._segwit_decode(hrp, ret) == (None, None):
+				raise Exception('Error: Failed to encode segwit address.')
 		return ret
 
 	@classmethod
@@ -91,6 +193,16 @@ class P2wpkh:
 		if net is None: net = BitcoinMainnet
 		return self._segwit_encode(net.SEGWIT_HRP, witver, h)
 
+	@classmethod
+	def segwit_addr_to_hash160(self, address: str, *, net=None) -> Optional[bytes]:
+		# Returns the hash160 of a p2wpkh address, or None if it is invalid.
+		if net is None: net = BitcoinMainnet
+		if not isinstance(address, str): return None
+		if not address.lower().startswith(net.SEGWIT_HRP + '1'): return None
+		witver, decoded = self._segwit_decode(net.SEGWIT_HRP, address)
+		if witver != 0 or len(decoded) != 20: return None
+		return bytes(decoded)
+
 	@classmethod
 	def public_key_to_p2wpkh(self, public_key: bytes, *, net=None) -> str:
 		if net is None: net = BitcoinMainnet
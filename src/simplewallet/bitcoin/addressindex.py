@@ -0,0 +1,66 @@
+# Simple Wallet
+# Copyright (c) 2023 Arctic Technology
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from typing import Iterable, List, Optional
+from .address import Address, AddressRecord
+from .helper import BitcoinMainnet, TXIN_LIST
+from .verifier import Verifier
+
+class AddressIndex:
+
+	def __init__(self, addresses: Iterable[str] = (), *, net=None):
+		# Decodes every address once into an AddressRecord (None if invalid)
+		# and indexes the rows by hash160, so that matching a key or a
+		# signature against all of them is a single dict lookup.
+		self.net = BitcoinMainnet if net == None else net
+		self.records = []
+		self._rows = {}
+		for address in addresses: self.add(address)
+
+	def __len__(self) -> int:
+		return len(self.records)
+
+	def add(self, address: str) -> int:
+		# Adds address as the next row and returns its row number.
+		row = len(self.records)
+		record = Address.parse(address, net=self.net)
+		self.records.append(record)
+		if record is not None:
+			self._rows.setdefault(record.hash160, []).append(row)
+		return row
+
+	def record(self, row: int) -> Optional[AddressRecord]:
+		return self.records[row]
+
+	def lookup(self, h160: bytes, txins: tuple = TXIN_LIST) -> List[int]:
+		# Returns the rows whose address is controlled by the pubkey of h160.
+		return [row for row in self._rows.get(h160, []) if self.records[row].txin in txins]
+
+	def match(self, row: int, h160: bytes, txins: tuple = TXIN_LIST) -> bool:
+		# Whether the address on row is controlled by the pubkey of h160.
+		record = self.records[row]
+		return record is not None and record.txin in txins and record.hash160 == h160
+
+	def with_privkey(self, privkey: str, txins: tuple = TXIN_LIST) -> List[int]:
+		return self.lookup(Address.privkey_to_hash160(privkey), txins)
+
+	def with_signature(self, signature: str, message: str, txins: tuple = TXIN_LIST) -> List[int]:
+		return self.lookup(Verifier.reveal_hash160(signature, message), txins)
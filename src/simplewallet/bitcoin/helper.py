@@ -19,6 +19,9 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
+import functools
+import hashlib
+import struct
 from ..crypto.sha256 import Sha256
 from ..utils.hexxer import Hexxer
 from ..utils.conversion import inv_dict
@@ -39,15 +42,67 @@ def variable_length_integer(i: int) -> str:
 	else:
 		return "ff" + Hexxer.int_to_hex(i,8)
 
+MAGIC_PREFIX = b"\x18Bitcoin Signed Message:\n"
+
+def compact_size(i: int) -> bytes:
+	# variable_length_integer as bytes, packed directly instead of through hex.
+	assert i >= 0, i
+	if i<0xfd:
+		return bytes([i])
+	elif i<=0xffff:
+		return b'\xfd' + struct.pack('<H', i)
+	elif i<=0xffffffff:
+		return b'\xfe' + struct.pack('<I', i)
+	else:
+		return b'\xff' + struct.pack('<Q', i)
+
 def magic_hd(message: bytes) -> bytes:
 	# Double hash Bitcoin Signed Message prefix + length + message
 	# in accordence with Bitcoin Message Magic signing logic.
 	# See: https://bitcoin.stackexchange.com/questions/34135/what-is-the-strmessagemagic-good-for.
-	vli = variable_length_integer(len(message))
-	length = Hexxer.bfh(vli)
-	raw_signed_msg = b"\x18Bitcoin Signed Message:\n" + length + message
+	raw_signed_msg = MAGIC_PREFIX + compact_size(len(message)) + message
 	return Sha256.hashd(raw_signed_msg)
 
+# Number of distinct messages cached_magic_hd remembers.
+MAGIC_HD_CACHE_SIZE = 1024
+
+@functools.lru_cache(maxsize=MAGIC_HD_CACHE_SIZE)
+def cached_magic_hd(message: bytes) -> bytes:
+	# magic_hd behind a bounded LRU, for bulk jobs where rows repeat messages.
+	return magic_hd(message)
+
+class MagicTemplate:
+	# magic_hd of messages that all start with prefix. The sha256 state after
+	# the magic prefix, the length and prefix is kept for every message
+	# length seen and copied for each message, so only the part after prefix
+	# is hashed.
+
+	# Number of message lengths a template keeps a state for.
+	MAX_STATES = 64
+
+	def __init__(self, prefix: bytes):
+		self.prefix = prefix
+		self._states = {}
+
+	def _midstate(self, length: int):
+		state = self._states.get(length)
+		if state == None:
+			state = hashlib.sha256(MAGIC_PREFIX + compact_size(length) + self.prefix)
+			if len(self._states) < self.MAX_STATES: self._states[length] = state
+		return state
+
+	def hash(self, suffix: bytes) -> bytes:
+		# magic_hd(prefix + suffix).
+		md = self._midstate(len(self.prefix) + len(suffix)).copy()
+		md.update(suffix)
+		return Sha256.hash(md.digest())
+
+@functools.lru_cache(maxsize=8)
+def magic_template(prefix: bytes) -> MagicTemplate:
+	# One MagicTemplate per prefix and process, so workers of a bulk job
+	# build its states once.
+	return MagicTemplate(prefix)
+
 class Wif:
 	WIF_SCRIPT_TYPES = {
 		'p2pkh':0,
@@ -0,0 +1,41 @@
+# Simple Wallet
+# Copyright (c) 2023 Arctic Technology
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# Entry point of the libsecp256k1 bindings used by Pubkey and Signer. The
+# bindings live in secp256k1, which loads libsecp256k1_0 and so creates its
+# context. It is only imported by the first access to one of the names
+# below (PEP 562), then they are copied here and later calls resolve them
+# as plain module attributes.
+
+import importlib
+
+__all__ = [
+	'CTX', 'ec_pubkey_parse', 'ec_pubkey_serialize', 'ec_pubkey_create', 'ec_pubkey_tweak_mul',
+	'ec_pubkey_combine', 'ecdsa_verify_compact', 'ecdsa_recoverable_signature_parse_compact',
+	'ecdsa_recover', 'ecdsa_sign_recoverable'
+]
+
+def __getattr__(name: str):
+	if name not in __all__:
+		raise AttributeError('module {!r} has no attribute {!r}'.format(__name__, name))
+	bindings = importlib.import_module('.secp256k1', __package__)
+	for attr in __all__: globals()[attr] = getattr(bindings, attr)
+	return globals()[name]
@@ -29,8 +29,8 @@ from ..crypto.sha256 import Sha256
 class Privkey:
 
 	@classmethod
-	def generate(self, compressed: bool = True) -> str:
-		# Generates privkey with the python secrets module, which is designed to
+	def generate_secretkey(self) -> bytes:
+		# Generates secretkey with the python secrets module, which is designed to
 		# create secure random data using synchronization methods so that no two
 		# processes can replicate the same data. In accordance with ECDSA, this
 		# function produces a cryptographically safe random integer k between the
@@ -42,8 +42,12 @@ class Privkey:
 		# Secrets Module: https://github.com/python/cpython/blob/3.6/Lib/secrets.py
 		bound = Ecdsa.CURVE_ORDER
 		randint = secrets.randbelow(bound - 1) + 1
-		secretkey = int.to_bytes(randint, length=32, byteorder='big', signed=False)
-		privkey, _ = self.serialize(secretkey, compressed)
+		return int.to_bytes(randint, length=32, byteorder='big', signed=False)
+
+	@classmethod
+	def generate(self, compressed: bool = True) -> str:
+		# Generates privkey from a freshly generated secretkey.
+		privkey, _ = self.serialize(self.generate_secretkey(), compressed)
 		return privkey
 
 	@classmethod
@@ -58,6 +62,19 @@ class Privkey:
 		privkey = Base.encode(vchIn + hash[0:4], base=58)
 		return privkey, compressed
 
+	@classmethod
+	def serialize_many(self, secretkeys: bytes, count: int, compressed: bool) -> list:
+		# Serializes count secretkeys packed in secretkeys, encoding all the
+		# privkeys as one Base58Check batch.
+		prefix = bytes([BitcoinMainnet.WIF_PREFIX])
+		suffix = b'\01' if compressed else b''
+		payloads = []
+		for i in range(count):
+			secretkey = secretkeys[i*32:(i+1)*32]
+			if not Ecdsa.isValid(secretkey): raise Exception('Error: Invalid secret byte.')
+			payloads.append(prefix + Ecdsa.normalize(secretkey) + suffix)
+		return Base.encode_check_many(b''.join(payloads), count, 33 + len(suffix))
+
 	@classmethod
 	def deserialize(self, privkey: str) -> Tuple[bytes, bool]:
 		# Deserialize privkey to (secretkey, compressed)
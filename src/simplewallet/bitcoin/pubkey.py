@@ -26,10 +26,7 @@
 
 import functools
 from typing import Tuple, Optional
-from ctypes import (
-	byref, cast, c_char_p, c_size_t, create_string_buffer
-)
-from libsecp256k1_0 import Secp256k1, SECP256K1_EC_UNCOMPRESSED
+from . import native
 from ..crypto.ecdsa import Ecdsa
 from ..utils.hexxer import Hexxer
 from ..utils.conversion import assert_bytes
@@ -38,6 +35,10 @@ from ..utils.conversion import assert_bytes
 class Pubkey(object):
 
 	def __init__(self, b: Optional[bytes]):
+		# The native 64-byte libsecp256k1 pubkey and the serializations are
+		# computed lazily and reused for the lifetime of the object.
+		self._native = None
+		self._serialized = {}
 		if b is not None:
 			assert isinstance(b, (bytes, bytearray)), f'pubkey must be bytes-like, not {type(b)}'
 			if isinstance(b, bytearray):
@@ -58,11 +59,8 @@ class Pubkey(object):
 		other %= Ecdsa.CURVE_ORDER
 		if self.is_at_infinity() or other == 0:
 			return INFINITY
-		pubkey = self._to_libsecp256k1_pubkey_ptr()
-
-		ret = Secp256k1._libsecp256k1.secp256k1_ec_pubkey_tweak_mul(Secp256k1._libsecp256k1.ctx,
-															pubkey, other.to_bytes(32, byteorder="big"))
-		if not ret:
+		pubkey = native.ec_pubkey_tweak_mul(self._get_native(), other.to_bytes(32, byteorder="big"))
+		if pubkey is None:
 			return INFINITY
 		return Pubkey._from_libsecp256k1_pubkey_ptr(pubkey)
 
@@ -75,29 +73,21 @@ class Pubkey(object):
 		if self.is_at_infinity(): return other
 		if other.is_at_infinity(): return self
 
-		pubkey1 = self._to_libsecp256k1_pubkey_ptr()
-		pubkey2 = other._to_libsecp256k1_pubkey_ptr()
-		pubkey_sum = create_string_buffer(64)
-
-		pubkey1 = cast(pubkey1, c_char_p)
-		pubkey2 = cast(pubkey2, c_char_p)
-		array_of_pubkey_ptrs = (c_char_p * 2)(pubkey1, pubkey2)
-		ret = Secp256k1._libsecp256k1.secp256k1_ec_pubkey_combine(Secp256k1._libsecp256k1.ctx,
-																pubkey_sum, array_of_pubkey_ptrs, 2)
-		if not ret:
+		pubkey_sum = native.ec_pubkey_combine((self._get_native(), other._get_native()))
+		if pubkey_sum is None:
 			return INFINITY
 		return Pubkey._from_libsecp256k1_pubkey_ptr(pubkey_sum)
 
 	def __eq__(self, other) -> bool:
 		if not isinstance(other, Pubkey):
 			return False
-		return self.point() == other.point()
+		return self._x == other._x and self._y == other._y
 
 	def __ne__(self, other):
 		return not (self == other)
 
 	def __hash__(self):
-		return hash(self.point())
+		return hash((self._x, self._y))
 
 	def __lt__(self, other):
 		if not isinstance(other, Pubkey):
@@ -105,7 +95,7 @@ class Pubkey(object):
 		return (self.x() or 0) < (other.x() or 0)
 
 	def is_at_infinity(self):
-		return self == INFINITY
+		return self._x is None
 
 	def point(self) -> Tuple[int, int]:
 		return self.x(), self.y()
@@ -119,40 +109,41 @@ class Pubkey(object):
 	def _x_and_y_from_pubkey_bytes(self, pubkey: bytes) -> Tuple[int, int]:
 		# Uses libsecp256k1 to extract x and y from pubkey bytes
 		assert isinstance(pubkey, bytes), f'Error: pubkey must be bytes, not {type(pubkey)}'
-		pubkey_ptr = create_string_buffer(64)
-		ret = Secp256k1._libsecp256k1.secp256k1_ec_pubkey_parse(
-			Secp256k1._libsecp256k1.ctx, pubkey_ptr, pubkey, len(pubkey))
-		if not ret:
+		pubkey_ptr = native.ec_pubkey_parse(pubkey)
+		if pubkey_ptr is None:
 			raise InvalidECPointException('Error: public key could not be parsed or is invalid')
 
-		pubkey_serialized = create_string_buffer(65)
-		pubkey_size = c_size_t(65)
-		Secp256k1._libsecp256k1.secp256k1_ec_pubkey_serialize(
-			Secp256k1._libsecp256k1.ctx, pubkey_serialized, byref(pubkey_size), pubkey_ptr, SECP256K1_EC_UNCOMPRESSED)
-		pubkey_serialized = bytes(pubkey_serialized)
+		pubkey_serialized = native.ec_pubkey_serialize(pubkey_ptr)
 		assert pubkey_serialized[0] == 0x04, pubkey_serialized
+		# Parsing already produced both forms, keep them for later use.
+		self._native = pubkey_ptr
+		self._serialized[False] = pubkey_serialized
 		x = int.from_bytes(pubkey_serialized[1:33], byteorder='big', signed=False)
 		y = int.from_bytes(pubkey_serialized[33:65], byteorder='big', signed=False)
 		return x, y
 
-	def _to_libsecp256k1_pubkey_ptr(self) -> 'Pubkey':
-		# Uses libsecp256k1 to parse pubkey
-		pubkey = create_string_buffer(64)
-		public_pair_bytes = self.get_public_key_bytes(compressed=False)
-		ret = Secp256k1._libsecp256k1.secp256k1_ec_pubkey_parse(
-			Secp256k1._libsecp256k1.ctx, pubkey, public_pair_bytes, len(public_pair_bytes))
-		if not ret:
-			raise Exception('Error: public key could not be parsed or is invalid')
-		return pubkey
+	def _get_native(self) -> bytes:
+		# Returns the native 64-byte pubkey, parsing it with libsecp256k1 only
+		# the first time.
+		if self._native is None:
+			pubkey = native.ec_pubkey_parse(self.get_public_key_bytes(compressed=False))
+			if pubkey is None:
+				raise Exception('Error: public key could not be parsed or is invalid')
+			self._native = pubkey
+		return self._native
 
 	@classmethod
-	def _from_libsecp256k1_pubkey_ptr(cls, pubkey) -> 'Pubkey':
-		# Uses libsecp256k1 to deserialize pubkey
-		pubkey_serialized = create_string_buffer(65)
-		pubkey_size = c_size_t(65)
-		Secp256k1._libsecp256k1.secp256k1_ec_pubkey_serialize(
-			Secp256k1._libsecp256k1.ctx, pubkey_serialized, byref(pubkey_size), pubkey, SECP256K1_EC_UNCOMPRESSED)
-		return Pubkey(bytes(pubkey_serialized))
+	def _from_libsecp256k1_pubkey_ptr(cls, pubkey: bytes) -> 'Pubkey':
+		# Uses libsecp256k1 to deserialize the native pubkey bytes.
+		pubkey_serialized = native.ec_pubkey_serialize(pubkey)
+		# The point is already valid, so take x and y from the serialization
+		# instead of parsing it again, and keep the native pubkey around.
+		obj = Pubkey(None)
+		obj._x = int.from_bytes(pubkey_serialized[1:33], byteorder='big', signed=False)
+		obj._y = int.from_bytes(pubkey_serialized[33:65], byteorder='big', signed=False)
+		obj._native = pubkey
+		obj._serialized[False] = pubkey_serialized
+		return obj
 
 	@classmethod
 	def _from_sig_string(cls, sig_string: bytes, recid: int, msg_hash: bytes) -> 'Pubkey':
@@ -162,14 +153,11 @@ class Pubkey(object):
 			raise Exception(f'Error: wrong encoding used for signature? len={len(sig_string)} (should be 64)')
 		if recid < 0 or recid > 3:
 			raise ValueError('Error: recid is {}, but should be 0 <= recid <= 3'.format(recid))
-		sig65 = create_string_buffer(65)
-		ret = Secp256k1._libsecp256k1.secp256k1_ecdsa_recoverable_signature_parse_compact(
-			Secp256k1._libsecp256k1.ctx, sig65, sig_string, recid)
-		if not ret:
+		sig65 = native.ecdsa_recoverable_signature_parse_compact(sig_string, recid)
+		if sig65 is None:
 			raise Exception('Error: failed to parse signature')
-		pubkey = create_string_buffer(64)
-		ret = Secp256k1._libsecp256k1.secp256k1_ecdsa_recover(Secp256k1._libsecp256k1.ctx, pubkey, sig65, msg_hash)
-		if not ret:
+		pubkey = native.ecdsa_recover(sig65, msg_hash)
+		if pubkey is None:
 			raise InvalidECPointException('Error: failed to recover public key')
 		return Pubkey._from_libsecp256k1_pubkey_ptr(pubkey)
 
@@ -191,22 +179,31 @@ class Pubkey(object):
 
 	@classmethod
 	def from_secretkey(cls, secretkey: bytes) -> 'Pubkey':
-		# Creates pubkey from secretkey
+		# Creates pubkey from secretkey with the precomputed generator tables
+		# of libsecp256k1. Secrets outside the curve order are rejected by
+		# the library, those fall back to multiplying the generator point.
+		pubkey = native.ec_pubkey_create(secretkey)
+		if pubkey is not None:
+			return Pubkey._from_libsecp256k1_pubkey_ptr(pubkey)
 		G = Ecdsa.GENERATOR_POINT
 		sk = int.from_bytes(secretkey, byteorder='big', signed=False)
 		return Pubkey(G)*sk
 
 	def get_public_key_bytes(self, compressed: bool) -> bytes:
 		# Return pubkey in bytes
+		serialized = self._serialized.get(compressed)
+		if serialized is not None: return serialized
 		if self.is_at_infinity(): raise Exception('Error: point is at infinity')
 		x = int.to_bytes(self.x(), length=32, byteorder='big', signed=False)
 		y = int.to_bytes(self.y(), length=32, byteorder='big', signed=False)
 		if compressed:
 			header = b'\x03' if self.y() & 1 else b'\x02'
-			return header + x
+			serialized = header + x
 		else:
 			header = b'\x04'
-			return header + x + y
+			serialized = header + x + y
+		self._serialized[compressed] = serialized
+		return serialized
 
 	def get_public_key_hex(self, compressed: bool) -> str:
 		# Return pubkey in hex
@@ -220,14 +217,7 @@ class Pubkey(object):
 		if not (isinstance(msg_hash, bytes) and len(msg_hash) == 32):
 			return {'status': 400, 'message': 'Error: msg_hash must be bytes, and 32 bytes exactly'}
 
-		sig = create_string_buffer(64)
-		ret = Secp256k1._libsecp256k1.secp256k1_ecdsa_signature_parse_compact(Secp256k1._libsecp256k1.ctx, sig, sig_string)
-		if not ret:
-			return {'status': 400, 'message': 'Error: Failed to verify signature.'}
-
-		ret = Secp256k1._libsecp256k1.secp256k1_ecdsa_signature_normalize(Secp256k1._libsecp256k1.ctx, sig, sig)
-		pubkey = self._to_libsecp256k1_pubkey_ptr()
-		if 1 != Secp256k1._libsecp256k1.secp256k1_ecdsa_verify(Secp256k1._libsecp256k1.ctx, sig, msg_hash, pubkey):
+		if not native.ecdsa_verify_compact(sig_string, msg_hash, self._get_native()):
 			return {'status': 400, 'message': 'Error: Failed to verify signature.'}
 
 		return {'status': 200, 'message': 'Successfully varified signature.'}
@@ -0,0 +1,163 @@
+# Simple Wallet
+# Copyright (c) 2023 Arctic Technology
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# Thin binding layer over libsecp256k1, loaded through native by the first
+# EC operation. Every function used by Pubkey, Signer and Verifier is bound
+# once here with its argtypes and restype, the context pointer is looked up
+# once, and output buffers are per-thread scratch space reused across calls.
+# Functions take and return bytes, native pubkeys are the 64-byte
+# libsecp256k1 structs.
+#
+# ctypes releases the GIL during the calls, so threads run the EC work
+# concurrently. Verification and recovery only read the shared context.
+# Signing uses a context cloned and randomized for each thread, so threads
+# neither share nor mutate one blinding state.
+
+import os
+import threading
+from ctypes import (
+	byref, c_char_p, c_int, c_size_t, c_uint, c_void_p, create_string_buffer, memmove
+)
+from typing import Iterable, Optional, Tuple
+from libsecp256k1_0 import Secp256k1, SECP256K1_EC_COMPRESSED, SECP256K1_EC_UNCOMPRESSED
+
+_lib = Secp256k1._libsecp256k1
+CTX = c_void_p(_lib.ctx)
+
+def _bind(name: str, argtypes: list, restype=c_int):
+	func = getattr(_lib, name)
+	func.argtypes = argtypes
+	func.restype = restype
+	return func
+
+_context_clone = _bind('secp256k1_context_clone', [c_void_p], c_void_p)
+_context_randomize = _bind('secp256k1_context_randomize', [c_void_p, c_char_p])
+_context_destroy = _bind('secp256k1_context_destroy', [c_void_p], None)
+_pubkey_parse = _bind('secp256k1_ec_pubkey_parse', [c_void_p, c_char_p, c_char_p, c_size_t])
+_pubkey_serialize = _bind('secp256k1_ec_pubkey_serialize', [c_void_p, c_char_p, c_void_p, c_char_p, c_uint])
+_pubkey_create = _bind('secp256k1_ec_pubkey_create', [c_void_p, c_char_p, c_char_p])
+_pubkey_tweak_mul = _bind('secp256k1_ec_pubkey_tweak_mul', [c_void_p, c_char_p, c_char_p])
+_pubkey_combine = _bind('secp256k1_ec_pubkey_combine', [c_void_p, c_char_p, c_void_p, c_size_t])
+_signature_parse_compact = _bind('secp256k1_ecdsa_signature_parse_compact', [c_void_p, c_char_p, c_char_p])
+_signature_normalize = _bind('secp256k1_ecdsa_signature_normalize', [c_void_p, c_char_p, c_char_p])
+_verify = _bind('secp256k1_ecdsa_verify', [c_void_p, c_char_p, c_char_p, c_char_p])
+_recoverable_parse_compact = _bind('secp256k1_ecdsa_recoverable_signature_parse_compact',
+								[c_void_p, c_char_p, c_char_p, c_int])
+_recover = _bind('secp256k1_ecdsa_recover', [c_void_p, c_char_p, c_char_p, c_char_p])
+# The recoverable signing functions are not bound by libsecp256k1_0.
+_sign_recoverable = _bind('secp256k1_ecdsa_sign_recoverable', [c_void_p, c_char_p, c_char_p, c_char_p, c_void_p, c_void_p])
+_recoverable_serialize_compact = _bind('secp256k1_ecdsa_recoverable_signature_serialize_compact',
+									[c_void_p, c_char_p, c_void_p, c_char_p])
+
+class _Context:
+	# A clone of the shared context with its own randomization, destroyed
+	# with the thread that owns it.
+	def __init__(self):
+		self.ptr = c_void_p(_context_clone(CTX))
+		_context_randomize(self.ptr, os.urandom(32))
+
+	def __del__(self):
+		try:
+			_context_destroy(self.ptr)
+		except:
+			pass
+
+class _Scratch(threading.local):
+	# Output buffers of the calling thread, their contents are copied out
+	# before a function returns so they are free again for the next call.
+	def __init__(self):
+		self.pubkey = create_string_buffer(64)
+		self.sig = create_string_buffer(65)
+		self.out = create_string_buffer(65)
+		self.size = c_size_t(65)
+		self.size_ref = byref(self.size)
+		self.recid = c_int(0)
+		self.recid_ref = byref(self.recid)
+		self._context = None
+
+	@property
+	def ctx(self) -> c_void_p:
+		# Signing context of the calling thread, cloned on first use.
+		if self._context is None: self._context = _Context()
+		return self._context.ptr
+
+_scratch = _Scratch()
+
+def ec_pubkey_parse(data: bytes) -> Optional[bytes]:
+	# Parses a serialized pubkey, returns the native pubkey or None.
+	s = _scratch
+	if not _pubkey_parse(CTX, s.pubkey, data, len(data)): return None
+	return s.pubkey.raw
+
+def ec_pubkey_serialize(native: bytes, compressed: bool = False) -> bytes:
+	s = _scratch
+	s.size.value = 65
+	_pubkey_serialize(CTX, s.out, s.size_ref, native,
+					SECP256K1_EC_COMPRESSED if compressed else SECP256K1_EC_UNCOMPRESSED)
+	return s.out.raw[:s.size.value]
+
+def ec_pubkey_create(secretkey: bytes) -> Optional[bytes]:
+	# Native pubkey of secretkey, or None if secretkey is out of range.
+	s = _scratch
+	if not _pubkey_create(CTX, s.pubkey, secretkey): return None
+	return s.pubkey.raw
+
+def ec_pubkey_tweak_mul(native: bytes, tweak: bytes) -> Optional[bytes]:
+	# native multiplied by the 32-byte scalar tweak, or None on failure.
+	s = _scratch
+	memmove(s.pubkey, native, 64)
+	if not _pubkey_tweak_mul(CTX, s.pubkey, tweak): return None
+	return s.pubkey.raw
+
+def ec_pubkey_combine(natives: Iterable[bytes]) -> Optional[bytes]:
+	# Sum of the native pubkeys, or None if it is the point at infinity.
+	natives = list(natives)
+	s = _scratch
+	if not _pubkey_combine(CTX, s.pubkey, (c_char_p * len(natives))(*natives), len(natives)): return None
+	return s.pubkey.raw
+
+def ecdsa_verify_compact(sig_string: bytes, msg_hash: bytes, native: bytes) -> bool:
+	# Verifies the 64-byte compact signature, normalized to lower-S, of
+	# msg_hash against the native pubkey.
+	s = _scratch
+	if not _signature_parse_compact(CTX, s.sig, sig_string): return False
+	_signature_normalize(CTX, s.sig, s.sig)
+	return _verify(CTX, s.sig, msg_hash, native) == 1
+
+def ecdsa_recoverable_signature_parse_compact(sig_string: bytes, recid: int) -> Optional[bytes]:
+	# Parses a compact signature and recid into a recoverable signature.
+	s = _scratch
+	if not _recoverable_parse_compact(CTX, s.sig, sig_string, recid): return None
+	return s.sig.raw
+
+def ecdsa_recover(recsig: bytes, msg_hash: bytes) -> Optional[bytes]:
+	# Native pubkey that signed msg_hash with the recoverable signature.
+	s = _scratch
+	if not _recover(CTX, s.pubkey, recsig, msg_hash): return None
+	return s.pubkey.raw
+
+def ecdsa_sign_recoverable(secretkey: bytes, msg_hash: bytes, extra_entropy: Optional[bytes]) -> Optional[Tuple[bytes, int]]:
+	# Signs msg_hash, returns (compact sig_string, recid) or None if the
+	# nonce generation failed or secretkey is invalid.
+	s = _scratch
+	if not _sign_recoverable(s.ctx, s.sig, msg_hash, secretkey, None, extra_entropy): return None
+	_recoverable_serialize_compact(CTX, s.out, s.recid_ref, s.sig)
+	return s.out.raw[:64], s.recid.value
@@ -20,76 +20,42 @@
 # SOFTWARE.
 
 import base64
-from ctypes import Array, create_string_buffer
-from typing import Tuple
-from libsecp256k1_0 import Secp256k1
+from typing import Iterable, List, Tuple
+from . import native
 from .helper import magic_hd
 from .privkey import Privkey
 from .verifier import Verifier
 from ..utils.conversion import to_bytes
+from ..utils.workerpool import WorkerPool
 
 class Signer:
 
 	@classmethod
-	def _sig_string_from_r_and_s(self, r: int, s: int) -> bytes:
-		# Gets signature from r and s
-		sig_string = (int.to_bytes(r, length=32, byteorder="big") +
-						int.to_bytes(s, length=32, byteorder="big"))
-		sig = create_string_buffer(64)
-		ret = Secp256k1._libsecp256k1.secp256k1_ecdsa_signature_parse_compact(Secp256k1._libsecp256k1.ctx, sig, sig_string)
-		if not ret:
-			raise Exception('Error: Deformed signature.')
-		ret = Secp256k1._libsecp256k1.secp256k1_ecdsa_signature_normalize(Secp256k1._libsecp256k1.ctx, sig, sig)
-		compact_signature = create_string_buffer(64)
-		Secp256k1._libsecp256k1.secp256k1_ecdsa_signature_serialize_compact(Secp256k1._libsecp256k1.ctx, compact_signature, sig)
-		return bytes(compact_signature)
-
-	@classmethod
-	def _sign_with_extra_entropy(self, sig: Array, secretkey: bytes, msg_hash: bytes,
-								nonce_function, extra_entropy) -> Tuple[int, int]:
-		# Add extra entropy to signature
-		ret = Secp256k1._libsecp256k1.secp256k1_ecdsa_sign(
-			Secp256k1._libsecp256k1.ctx, sig, msg_hash, secretkey,
-			nonce_function, extra_entropy)
-		if not ret:
+	def _sign_recoverable_with_extra_entropy(self, secretkey: bytes, msg_hash: bytes,
+											extra_entropy) -> Tuple[bytes, int]:
+		# Create a recoverable signature, returns (sig_string, recid). The
+		# signature created by libsecp256k1 is already in lower-S form.
+		signed = native.ecdsa_sign_recoverable(secretkey, msg_hash, extra_entropy)
+		if signed is None:
 			raise Exception('Error: the nonce generation function failed, or the private key was invalid')
-		compact_signature = create_string_buffer(64)
-		Secp256k1._libsecp256k1.secp256k1_ecdsa_signature_serialize_compact(Secp256k1._libsecp256k1.ctx, compact_signature, sig)
-		r = int.from_bytes(compact_signature[:32], byteorder="big")
-		s = int.from_bytes(compact_signature[32:], byteorder="big")
-		return r, s
+		return signed
 
 	@classmethod
-	def _sign(self, secretkey: bytes, msg_hash: bytes, sigencode=None) -> bytes:
-		# Create signature with secretkey and message hash.
+	def _sign(self, secretkey: bytes, msg_hash: bytes) -> Tuple[bytes, int]:
+		# Create signature with secretkey and message hash, returns (sig_string, recid).
 		if not (isinstance(msg_hash, bytes) and len(msg_hash) == 32):
 			raise Exception('Error: msg_hash to be signed must be bytes, and 32 bytes exactly')
-		if sigencode is None:
-			sigencode = self._sig_string_from_r_and_s
 
-		sig = create_string_buffer(64)
-		nonce_function=None
-		extra_entropy=None
-		r, s = self._sign_with_extra_entropy(sig=sig, secretkey=secretkey, msg_hash=msg_hash,
-								nonce_function=nonce_function, extra_entropy=extra_entropy)
+		sig_string, recid = self._sign_recoverable_with_extra_entropy(secretkey, msg_hash, None)
 
 		counter = 0
 		# Grind for a low r value. See link for details: https://github.com/bitcoin/bitcoin/pull/13666.
-		while r >= 2**255:
+		while sig_string[0] >= 0x80:
 			counter += 1
 			extra_entropy = counter.to_bytes(32, byteorder="little")
-			r, s = self._sign_with_extra_entropy(sig=sig, secretkey=secretkey, msg_hash=msg_hash,
-								nonce_function=nonce_function, extra_entropy=extra_entropy)
-
-		sig_string = self._sig_string_from_r_and_s(r, s)
-
-		verify = Verifier.verify_hash_with_sk(secretkey=secretkey,
-											sig_string=sig_string, msg_hash=msg_hash)
-		if verify['status'] != 200:
-			raise Exception(verify['message'])
+			sig_string, recid = self._sign_recoverable_with_extra_entropy(secretkey, msg_hash, extra_entropy)
 
-		sig = sigencode(r, s)
-		return sig
+		return sig_string, recid
 
 	@classmethod
 	def _construct_sig65(self, sig_string: bytes, recid: int, is_compressed: bool) -> bytes:
@@ -98,31 +64,24 @@ class Signer:
 		return bytes([27 + recid + comp]) + sig_string
 
 	@classmethod
-	def _bruteforce_recid(self, secretkey: bytes, message: bytes, sig_string: bytes,
-						is_compressed: bool, algo) -> Tuple[bytes, int]:
-		# Bruteforce recid to create sig65
-		for recid in range(4):
-			sig65 = self._construct_sig65(sig_string, recid, is_compressed)
-			verify = Verifier.verify_sig_with_sk(secretkey=secretkey, sig65=sig65,
-													message=message, algo=algo)
-			if verify['status'] == 200:
-				return sig65, recid
-			else:
-				continue
-		else:
-			raise Exception('Error: Cannot sign message, no recid fits')
-
-	@classmethod
-	def _sign_message_with_sk(self, secretkey: bytes, message: str, compressed: bool, algo=lambda x: magic_hd(x)) -> bytes:
-		# Sign message with secretkey
-		msg_bytes = to_bytes(message, 'utf8')
-		msg_hash = algo(msg_bytes)
-		sig_string = self._sign(secretkey, msg_hash, sigencode=self._sig_string_from_r_and_s)
-		sig65, _ = self._bruteforce_recid(secretkey, msg_bytes, sig_string, compressed, algo)
+	def _sign_message_with_sk(self, secretkey: bytes, message: str, compressed: bool,
+							algo=lambda x: magic_hd(x), verify: bool = True, msg_hash: bytes = None) -> bytes:
+		# Sign message with secretkey. The recid comes straight from the
+		# recoverable signature, so the only extra EC work is the optional
+		# check that the sig65 recovers to the pubkey of the secretkey. A
+		# msg_hash already computed for message is used as is.
+		if msg_hash == None: msg_hash = algo(to_bytes(message, 'utf8'))
+		sig_string, recid = self._sign(secretkey, msg_hash)
+		sig65 = self._construct_sig65(sig_string, recid, compressed)
+		if verify:
+			check = Verifier.verify_sig_hash_with_sk(secretkey=secretkey, sig65=sig65, msg_hash=msg_hash)
+			if check['status'] != 200:
+				raise Exception(check['message'])
 		return sig65
 
 	@classmethod
-	def sign_message(self, privkey: str, message: str, algo=lambda x: magic_hd(x)) -> dict:
+	def sign_message(self, privkey: str, message: str, algo=lambda x: magic_hd(x), verify: bool = True,
+					msg_hash: bytes = None) -> dict:
 		#Put sign message into Signer and change secretkey to privkey
 		if privkey == '' and message == '':
 			return {'status': 401, 'message': 'Error: Empty privkey and message.', 'signature': None}
@@ -139,8 +98,17 @@ class Signer:
 			return {'status': 400, 'message': 'Error: Invalid privkey, no action taken.', 'signature': None}
 
 		try:
-			raw_signature = Signer._sign_message_with_sk(secretkey, message, compressed, algo)
+			raw_signature = Signer._sign_message_with_sk(secretkey, message, compressed, algo, verify, msg_hash)
 			signature = base64.b64encode(raw_signature).decode('ascii')
 			return {'status': 200, 'message': 'Successfully created signature.', 'signature': signature}
 		except:
 			return {'status': 400, 'message': 'Error: Failed to create signature.', 'signature': None}
+
+	@classmethod
+	def sign_message_many(self, rows: Iterable[tuple], workers: int = 0, chunksize: int = 64,
+						algo=lambda x: magic_hd(x), verify: bool = True) -> List[dict]:
+		# Signs (privkey, message) rows on a pool of threads like
+		# Verifier.with_signature_many, returns the sign_message result of
+		# every row in order. Each thread signs with its own context.
+		return WorkerPool.map(lambda row: self.sign_message(*row, algo=algo, verify=verify), rows,
+							workers=workers, chunksize=chunksize, threads=True)
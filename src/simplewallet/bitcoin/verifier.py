@@ -19,26 +19,38 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 import base64
+from typing import Iterable, List
 from .address import Address
 from .helper import magic_hd, TXIN_LIST
 from .pubkey import Pubkey
+from ..crypto.hash160 import Hash160
 from ..utils.conversion import assert_bytes, to_bytes
+from ..utils.workerpool import WorkerPool
 
 class Verifier:
 
 	@classmethod
-	def reveal_address(self, signature: str, message: str, txin: str, algo=lambda x: magic_hd(x)) -> str:
-		# Reveals address with message and signature
+	def reveal_hash160(self, signature: str, message: str, algo=lambda x: magic_hd(x), msg_hash: bytes = None) -> bytes:
+		# Reveals the hash160 of the pubkey with message and signature, from
+		# which the address of every txin can be encoded. A msg_hash already
+		# computed for message is used as is.
 		sig65 = base64.b64decode(signature)
-		msg = to_bytes(message)
-		assert_bytes(msg)
-		msg_hash = algo(msg)
+		if msg_hash == None:
+			msg = to_bytes(message)
+			assert_bytes(msg)
+			msg_hash = algo(msg)
 		pubkey, compressed = Pubkey.from_signature65(sig65, msg_hash)
 		pubkeybytes = pubkey.get_public_key_bytes(compressed)
-		return Address.from_pubkey(pubkeybytes, txin)
+		return Hash160.hash(pubkeybytes)
 
 	@classmethod
-	def with_signature(self, address: str, signature: str, message: str, algo=lambda x: magic_hd(x)) -> dict:
+	def reveal_address(self, signature: str, message: str, txin: str, algo=lambda x: magic_hd(x)) -> str:
+		# Reveals address with message and signature
+		return Address.from_hash160(self.reveal_hash160(signature, message, algo), txin)
+
+	@classmethod
+	def with_signature(self, address: str, signature: str, message: str, algo=lambda x: magic_hd(x),
+					msg_hash: bytes = None) -> dict:
 		# Verify address with message and signature
 		if address == '' and signature == '' and message == '':
 			return {'status': 401, 'message': 'Error: Empty address, signature, and message.', 'matched': None}
@@ -49,17 +61,28 @@ class Verifier:
 		if signature == '' or message == '':
 			return {'status': 400, 'message': 'Error: Signature/message cannot be blank.', 'matched': None}
 
+		# The pubkey is recovered once and the address is decoded to its
+		# hash160, so matching is a byte comparison for every txin.
 		try:
-			for txin in TXIN_LIST:
-				if address == self.reveal_address(signature, message, txin, algo):
-					return {'status': 200, 'message': 'Match found, verification complete.', 'matched': True}
-				else:
-					pass
+			h160 = self.reveal_hash160(signature, message, algo, msg_hash)
+			txin, target = Address.to_hash160(address)
+			if txin in TXIN_LIST and target == h160:
+				return {'status': 200, 'message': 'Match found, verification complete.', 'matched': True}
 			else:
 				return {'status': 200, 'message': 'Match NOT found, verification complete.', 'matched': False}
 		except:
 			return {'status': 400, 'message': 'Error: Invalid signature, verification failed.', 'matched': None}
 
+	@classmethod
+	def with_signature_many(self, rows: Iterable[tuple], workers: int = 0, chunksize: int = 64,
+							algo=lambda x: magic_hd(x)) -> List[dict]:
+		# Verifies (address, signature, message) rows on a pool of threads and
+		# returns the with_signature result of every row in order. The
+		# libsecp256k1 calls release the GIL and only read the shared context,
+		# so the EC work of the rows runs concurrently without forking.
+		return WorkerPool.map(lambda row: self.with_signature(*row, algo=algo), rows,
+							workers=workers, chunksize=chunksize, threads=True)
+
 	@classmethod
 	def with_privkey(self, address: str, privkey: str) -> dict:
 		# Verify address with privkey
@@ -70,11 +93,10 @@ class Verifier:
 			return {'status': 400, 'message': 'Error: Address/privkey cannot be blank.', 'matched': None}
 
 		try:
-			for txin in TXIN_LIST:
-				if address == Address.from_privkey(privkey, txin):
-					return {'status': 200, 'message': 'Match found, verification complete.', 'matched': True}
-				else:
-					pass
+			h160 = Address.privkey_to_hash160(privkey)
+			txin, target = Address.to_hash160(address)
+			if txin in TXIN_LIST and target == h160:
+				return {'status': 200, 'message': 'Match found, verification complete.', 'matched': True}
 			else:
 				return {'status': 200, 'message': 'Match NOT found, verification complete.', 'matched': False}
 		except:
@@ -96,3 +118,19 @@ class Verifier:
 	def verify_hash_with_sk(self, secretkey: bytes, sig_string: bytes, msg_hash: bytes) -> dict:
 		pubkey_from_sk = Pubkey.from_secretkey(secretkey)
 		return pubkey_from_sk.verify_message_hash(sig_string=sig_string, msg_hash=msg_hash)
+
+	@classmethod
+	def verify_sig_hash_with_sk(self, secretkey: bytes, sig65: bytes, msg_hash: bytes) -> dict:
+		# A pubkey recovered from a signature always validates it, so a single
+		# recovery compared against the pubkey of secretkey checks both the
+		# signature and its recid.
+		pubkey_from_sk = Pubkey.from_secretkey(secretkey)
+		try:
+			pubkey_from_sig, _ = Pubkey.from_signature65(sig65, msg_hash)
+		except:
+			return {'status': 400, 'message': 'Error: Failed to verify signature.'}
+
+		if pubkey_from_sig != pubkey_from_sk:
+			return {'status': 400, 'message': 'Error: Failed to verify signature.'}
+
+		return {'status': 200, 'message': 'Successfully varified signature.'}
@@ -23,13 +23,94 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
-from typing import Optional, Union
+import functools
+import math
+from typing import List, Optional, Tuple, Union
+from .sha256 import Sha256
 from ..utils.conversion import assert_bytes, to_bytes
+from ..utils.optional import optional_import
+
+# Digits are converted LIMB_DIGITS at a time, base**10 stays within 64 bits
+# for every supported base, and limbs are split into digit pairs. Numbers
+# longer than DC_DIGITS digits are split in halves recursively so that the
+# big integer work is sub-quadratic.
+LIMB_DIGITS = 10
+DC_DIGITS = 256
+# Smallest batch converted with numpy by the *_check_many codecs, smaller
+# ones are faster through encode and decode one row at a time.
+MANY_MIN_COUNT = 64
+
+@functools.lru_cache(maxsize=None)
+def _power(base: int, exp: int) -> int:
+	return base ** exp
+
+def _digits_to_int(digits: bytes, base: int) -> int:
+	# Big-endian digit values to integer.
+	n = len(digits)
+	if n > DC_DIGITS:
+		k = n // 2
+		return (_digits_to_int(digits[:n-k], base) * _power(base, k)
+				+ _digits_to_int(digits[n-k:], base))
+	value = 0
+	start = 0
+	end = n % LIMB_DIGITS or LIMB_DIGITS
+	while start < n:
+		limb = 0
+		for d in digits[start:end]:
+			limb = limb * base + d
+		value = value * _power(base, end - start) + limb
+		start = end; end += LIMB_DIGITS
+	return value
+
+@functools.lru_cache(maxsize=None)
+def _pairs(base: int) -> tuple:
+	# Two big-endian digit values for every number below base**2.
+	return tuple(bytes(divmod(i, base)) for i in range(base * base))
+
+def _int_to_digits(value: int, base: int, width: int = 0) -> bytearray:
+	# Integer to big-endian digit values, left padded with zeros to width.
+	# Zero has no digits unless padded.
+	estimate = int(value.bit_length() / math.log2(base)) + 1
+	if estimate > DC_DIGITS:
+		k = estimate // 2
+		high, low = divmod(value, _power(base, k))
+		return _int_to_digits(high, base, width - k) + _int_to_digits(low, base, k)
+	limbsize = _power(base, LIMB_DIGITS)
+	limbs = []
+	while value >= limbsize:
+		value, limb = divmod(value, limbsize)
+		limbs.append(limb)
+	result = bytearray()
+	while value:
+		value, d = divmod(value, base)
+		result.append(d)
+	result.reverse()
+	pairsize = base * base
+	pairs = _pairs(base)
+	for limb in reversed(limbs):
+		chunk = []
+		for _ in range(LIMB_DIGITS // 2):
+			limb, pair = divmod(limb, pairsize)
+			chunk.append(pairs[pair])
+		chunk.reverse()
+		result += b''.join(chunk)
+	if len(result) < width:
+		result[0:0] = bytes(width - len(result))
+	return result
+
+def _tables(chars: bytes) -> tuple:
+	# (digit to char, char to digit) 256-entry tables for bytes.translate,
+	# 0xff marks a character outside the alphabet.
+	encode = bytearray(256); decode = bytearray(b'\xff' * 256)
+	for i, c in enumerate(chars):
+		encode[i] = c; decode[c] = i
+	return bytes(encode), bytes(decode)
 
 class Base:
 
 	__b58chars = b'123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz'
 	__b43chars = b'0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ$*+-./:'
+	__tables = {58: _tables(__b58chars), 43: _tables(__b43chars)}
 
 	@classmethod
 	def encode(self, v: bytes, *, base: int) -> str:
@@ -37,33 +118,13 @@ class Base:
 		assert_bytes(v)
 		if base not in (58, 43):
 			raise ValueError('not supported base: {}'.format(base))
-		chars = self.__b58chars
-		if base == 43:
-			chars = self.__b43chars
-		long_value = 0
-		power_of_base = 1
-
-		# naive but slow variant: long_value += (256**i) * c
-		for c in v[::-1]:
-			long_value += power_of_base * c
-			power_of_base <<= 8
-		result = bytearray()
-		while long_value >= base:
-			div, mod = divmod(long_value, base)
-			result.append(chars[mod])
-			long_value = div
-		result.append(chars[long_value])
+		encode_table, _ = self.__tables[base]
+		digits = _int_to_digits(int.from_bytes(v, byteorder='big'), base) or bytearray(1)
 		# Bitcoin does a little leading-zero-compression:
 		# leading 0-bytes in the input become leading-1s
-		nPad = 0
-		for c in v:
-			if c == 0x00:
-				nPad += 1
-			else:
-				break
-		result.extend([chars[0]] * nPad)
-		result.reverse()
-		return result.decode('ascii')
+		nPad = len(v) - len(v.lstrip(b'\x00'))
+		result = bytes(nPad) + digits
+		return result.translate(encode_table).decode('ascii')
 
 	@classmethod
 	def decode(self, v: Union[bytes, str], *, base: int, length: int = None) -> Optional[bytes]:
@@ -71,32 +132,149 @@ class Base:
 		v = to_bytes(v, 'ascii')
 		if base not in (58, 43):
 			raise ValueError('Error: Not supported base: {}'.format(base))
-		chars = self.__b58chars
-		if base == 43:
-			chars = self.__b43chars
-		long_value = 0
-		power_of_base = 1
-		for c in v[::-1]:
-			digit = chars.find(bytes([c]))
-			if digit == -1:
-				raise Exception('Error: Forbidden character {} for base {}'.format(c, base))
-			# naive but slow variant: long_value += digit * (base**i)
-			long_value += digit * power_of_base
-			power_of_base *= base
-		result = bytearray()
-		while long_value >= 256:
-			div, mod = divmod(long_value, 256)
-			result.append(mod)
-			long_value = div
-		result.append(long_value)
-		nPad = 0
-		for c in v:
-			if c == chars[0]:
-				nPad += 1
-			else:
-				break
-		result.extend(b'\x00' * nPad)
+		_, decode_table = self.__tables[base]
+		digits = v.translate(decode_table)
+		if b'\xff' in digits:
+			c = v[digits.rindex(b'\xff')]
+			raise Exception('Error: Forbidden character {} for base {}'.format(c, base))
+		long_value = _digits_to_int(digits, base)
+		nPad = len(digits) - len(digits.lstrip(b'\x00'))
+		result = bytes(nPad) + long_value.to_bytes(max(1, (long_value.bit_length() + 7) // 8), byteorder='big')
 		if length is not None and len(result) != length:
 			return None
-		result.reverse()
-		return bytes(result)
\ No newline at end of file
+		return result
+
+	@classmethod
+	def encode_check_many(self, payloads: bytes, count: int, length: int, *, base: int = 58) -> List[str]:
+		# Base58Check encodes count payloads of length bytes packed in payloads,
+		# appending the 4-byte Sha256.hashd checksum of each. With numpy the
+		# whole batch is converted at once with limb arithmetic, otherwise,
+		# or below MANY_MIN_COUNT payloads, it falls back to encode for every
+		# payload.
+		assert_bytes(payloads)
+		if base not in (58, 43):
+			raise ValueError('not supported base: {}'.format(base))
+		if len(payloads) != count * length:
+			raise ValueError('Error: Expected {} bytes of payloads, got {}.'.format(count * length, len(payloads)))
+		rows = [payloads[i*length:(i+1)*length] for i in range(count)]
+		data = b''.join(row + Sha256.hashd(row)[0:4] for row in rows)
+		width = length + 4
+		if count < MANY_MIN_COUNT or optional_import('numpy') is None:
+			return [self.encode(data[i*width:(i+1)*width], base=base) for i in range(count)]
+		return self._encode_many(data, count, width, base)
+
+	@classmethod
+	def decode_check_many(self, encoded: List[str], length: int, *, base: int = 58) -> Tuple[bytes, List[bool]]:
+		# Decodes a batch of Base58Check strings whose payloads are length
+		# bytes and checks their checksums. Returns the payloads packed in one
+		# buffer, with zero bytes for invalid rows, and the validity of every
+		# row. Uses numpy when available like encode_check_many.
+		if base not in (58, 43):
+			raise ValueError('Error: Not supported base: {}'.format(base))
+		width = length + 4
+		if len(encoded) < MANY_MIN_COUNT or optional_import('numpy') is None:
+			decoded = []
+			for v in encoded:
+				try:
+					decoded.append(self.decode(v, base=base, length=width))
+				except:
+					decoded.append(None)
+		else:
+			decoded = self._decode_many(encoded, width, base)
+
+		payloads = []; valid = []
+		for vch in decoded:
+			ok = vch is not None and Sha256.hashd(vch[0:length])[0:4] == vch[length:width]
+			payloads.append(vch[0:length] if ok else bytes(length))
+			valid.append(ok)
+		return b''.join(payloads), valid
+
+	@classmethod
+	def _encode_many(self, data: bytes, count: int, width: int, base: int) -> List[str]:
+		# Every row is a big-endian number held in uint32 limbs. Each pass
+		# divides all rows at once by base**5, the remainders give the next
+		# five digits from the least significant end.
+		numpy = optional_import('numpy')
+		encode_table, _ = self.__tables[base]
+		limbdigits = 5
+		divisor = numpy.uint64(base ** limbdigits)
+		rows = numpy.frombuffer(data, dtype=numpy.uint8).reshape(count, width)
+		pad = (-width) % 4
+		padded = numpy.concatenate([numpy.zeros((count, pad), dtype=numpy.uint8), rows], axis=1)
+		limbs = numpy.ascontiguousarray(padded).view('>u4').astype(numpy.uint64)
+		ndigits = math.ceil(width * 8 / math.log2(base))
+		passes = math.ceil(ndigits / limbdigits)
+		digits = numpy.zeros((count, passes * limbdigits), dtype=numpy.uint8)
+		shift = numpy.uint64(32); ubase = numpy.uint64(base)
+		for p in range(passes):
+			rem = numpy.zeros(count, dtype=numpy.uint64)
+			for j in range(limbs.shape[1]):
+				cur = (rem << shift) | limbs[:, j]
+				limbs[:, j] = cur // divisor
+				rem = cur % divisor
+			for i in range(limbdigits):
+				digits[:, (passes - p) * limbdigits - 1 - i] = rem % ubase
+				rem //= ubase
+
+		nonzero = rows != 0
+		npads = numpy.where(nonzero.any(axis=1), nonzero.argmax(axis=1), width).tolist()
+		text = digits.tobytes().translate(encode_table).decode('ascii')
+		zero = chr(encode_table[0]); size = digits.shape[1]
+		result = []
+		for i in range(count):
+			# Same leading-zero-compression as encode.
+			result.append(zero * npads[i] + (text[i*size:(i+1)*size].lstrip(zero) or zero))
+		return result
+
+	@classmethod
+	def _decode_many(self, encoded: List[str], width: int, base: int) -> List[Optional[bytes]]:
+		# Returns the decoded bytes of every row, as decode(length=width)
+		# would, or None. Rows are left padded with zero digits and
+		# accumulated into uint32 limbs five digits at a time.
+		numpy = optional_import('numpy')
+		encode_table, decode_table = self.__tables[base]
+		zero = encode_table[0:1]
+		limbdigits = 5
+		raws = []; npads = []
+		for v in encoded:
+			try:
+				raw = to_bytes(v, 'ascii')
+			except:
+				raw = b'\xff'
+			raws.append(raw)
+			npads.append(len(raw) - len(raw.lstrip(zero)))
+		size = math.ceil(max(len(raw) for raw in raws) / limbdigits) * limbdigits
+		text = b''.join(raw.rjust(size, zero) for raw in raws).translate(decode_table)
+		digits = numpy.frombuffer(text, dtype=numpy.uint8).reshape(len(raws), size)
+		invalid = (digits == 0xff).any(axis=1)
+		digits = numpy.where(digits == 0xff, 0, digits).astype(numpy.uint64)
+
+		nlimbs = math.ceil(width / 4) + 1
+		limbs = numpy.zeros((len(raws), nlimbs), dtype=numpy.uint64)
+		multiplier = numpy.uint64(base ** limbdigits)
+		mask = numpy.uint64(0xffffffff); shift = numpy.uint64(32); ubase = numpy.uint64(base)
+		for g in range(0, size, limbdigits):
+			carry = numpy.zeros(len(raws), dtype=numpy.uint64)
+			for i in range(limbdigits):
+				carry = carry * ubase + digits[:, g + i]
+			for j in range(nlimbs - 1, -1, -1):
+				cur = limbs[:, j] * multiplier + carry
+				limbs[:, j] = cur & mask
+				carry = cur >> shift
+			invalid |= carry != 0
+
+		values = limbs.astype('>u4').view(numpy.uint8).reshape(len(raws), nlimbs * 4)
+		invalid |= values[:, :nlimbs * 4 - width].any(axis=1)
+		values = values[:, nlimbs * 4 - width:]
+		nonzero = values != 0
+		leading = numpy.where(nonzero.any(axis=1), nonzero.argmax(axis=1), width - 1).tolist()
+		invalid = invalid.tolist()
+		data = values.tobytes()
+		result = []
+		for i in range(len(raws)):
+			# Same length rule as decode: padding plus the minimal bytes of the value.
+			if invalid[i] or npads[i] + width - leading[i] != width:
+				result.append(None)
+			else:
+				result.append(data[i*width:(i+1)*width])
+		return result
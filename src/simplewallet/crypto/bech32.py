@@ -21,20 +21,27 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 # THE SOFTWARE.
 
+import functools
+
+GENERATOR = (0x3b6a57b2, 0x26508e6d, 0x1ea119fa, 0x3d4233dd, 0x2a1462b3)
+
+# The generator terms xored into the checksum for every value of its top 5
+# bits, so that _polymod does one lookup per symbol instead of five tests.
+POLYMOD_TABLE = tuple(
+	functools.reduce(lambda chk, i: chk ^ (GENERATOR[i] if (top >> i) & 1 else 0), range(5), 0)
+	for top in range(32))
+
 class Bech32:
 
 	CHARSET = "qpzry9x8gf2tvdw0s3jn54khce6mua7l"
 
 	@classmethod
-	def _polymod(self, values):
-		# Internal function that computes the Bech32 checksum.
-		generator = [0x3b6a57b2, 0x26508e6d, 0x1ea119fa, 0x3d4233dd, 0x2a1462b3]
-		chk = 1
+	def _polymod(self, values, chk=1):
+		# Internal function that computes the Bech32 checksum, continuing from
+		# the state chk.
+		table = POLYMOD_TABLE
 		for value in values:
-			top = chk >> 25
-			chk = (chk & 0x1ffffff) << 5 ^ value
-			for i in range(5):
-				chk ^= generator[i] if ((top >> i) & 1) else 0
+			chk = ((chk & 0x1ffffff) << 5 ^ value) ^ table[chk >> 25]
 		return chk
 
 	@classmethod
@@ -42,17 +49,23 @@ class Bech32:
 		# Expand the HRP into values for checksum computation.
 		return [ord(x) >> 5 for x in hrp] + [0] + [ord(x) & 31 for x in hrp]
 
+	@classmethod
+	@functools.lru_cache(maxsize=16)
+	def _hrp_state(self, hrp):
+		# Checksum state after the expanded HRP, the same for every address
+		# of a network ('bc' on mainnet) so it is only computed once.
+		return self._polymod(self._hrp_expand(hrp))
+
 	@classmethod
 	def _create_checksum(self, hrp, data):
 		# Compute the checksum values given HRP and data.
-		values = self._hrp_expand(hrp) + data
-		polymod = self._polymod(values + [0, 0, 0, 0, 0, 0]) ^ 1
+		polymod = self._polymod(data + [0, 0, 0, 0, 0, 0], self._hrp_state(hrp)) ^ 1
 		return [(polymod >> 5 * (5 - i)) & 31 for i in range(6)]
 
 	@classmethod
 	def _verify_checksum(self, hrp, data):
 		# Verify a checksum given HRP and converted data characters.
-		return self._polymod(self._hrp_expand(hrp) + data) == 1
+		return self._polymod(data, self._hrp_state(hrp)) == 1
 
 	@classmethod
 	def encode(self, hrp, data):
@@ -29,8 +29,25 @@ class Hash160:
 	def hash(self, x: bytes) -> bytes:
 		return Ripemd.hash(Sha256.hash(x))
 
+	@classmethod
+	def hash_many(self, buffer: bytes, count: int, keylen: int) -> bytes:
+		# Hash160 of count keys of keylen bytes packed in buffer, returns the
+		# 20*count byte hashes packed the same way. The 32-byte sha256
+		# digests go through Ripemd.hash_packed as one batch.
+		if len(buffer) != count * keylen:
+			raise ValueError('Error: Expected {} bytes of keys, got {}.'.format(count * keylen, len(buffer)))
+		digests = b''.join(Sha256.hash(buffer[i*keylen:(i+1)*keylen]) for i in range(count))
+		return Ripemd.hash_packed(digests, count, 32)
+
 	@classmethod
 	def hash160_to_b58_address(self, h160: bytes, addrtype: int) -> str:
 		s = bytes([addrtype]) + h160
 		s = s + Sha256.hashd(s)[0:4]
 		return Base.encode(s, base=58)
+
+	@classmethod
+	def hash160_to_b58_address_many(self, h160s: bytes, count: int, addrtype: int) -> list:
+		# Encodes count hash160s packed in h160s as one Base58Check batch.
+		prefix = bytes([addrtype])
+		payloads = b''.join(prefix + h160s[i*20:(i+1)*20] for i in range(count))
+		return Base.encode_check_many(payloads, count, 21)
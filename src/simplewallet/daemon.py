@@ -0,0 +1,354 @@
+# Simple Wallet
+# Copyright (c) 2023 Arctic Technology
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import argparse
+import json
+import os
+import queue
+import socketserver
+import stat
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List
+from .bitcoin.address import Address
+from .bitcoin.helper import cached_magic_hd, TXIN_LIST
+from .bitcoin.privkey import Privkey
+from .bitcoin.signer import Signer
+from .bitcoin.verifier import Verifier
+from .utils.stats import Stats
+
+# Long running service mode. Requests are JSON objects with an 'op' of
+# sign, verify or address, accepted one per line over a Unix domain socket
+# or as the POST body of /sign, /verify or /address on localhost HTTP.
+# Concurrent requests are coalesced by a MicroBatcher into batches of at
+# most max_batch, waiting at most max_wait seconds for a batch to fill,
+# and every batch runs as one task on a warm pool of threads.
+
+def _sign_batch(requests: List[dict]) -> List[dict]:
+	# {privkey, message} requests, answered like Signer.sign_message. A
+	# message shared by the batch is hashed once through cached_magic_hd.
+	return [Signer.sign_message(request.get('privkey', ''), request.get('message', ''), algo=cached_magic_hd)
+			for request in requests]
+
+def _verify_batch(requests: List[dict]) -> List[dict]:
+	# {address, signature, message} or {address, privkey} requests,
+	# answered like Verifier.with_signature and Verifier.with_privkey.
+	result = []
+	for request in requests:
+		address = request.get('address', '')
+		if 'privkey' in request:
+			result.append(Verifier.with_privkey(address, request['privkey']))
+		else:
+			result.append(Verifier.with_signature(address, request.get('signature', ''),
+												request.get('message', ''), algo=cached_magic_hd))
+	return result
+
+def _address_batch(requests: List[dict]) -> List[dict]:
+	# {privkey, mode} requests, answered with the {txin: address} of the
+	# privkey. The pubkeys of the batch are hashed and encoded together,
+	# grouped by compression.
+	result = [None] * len(requests)
+	groups = {True: [], False: []}
+	for index, request in enumerate(requests):
+		mode = request.get('mode', 'p2wpkh')
+		if mode != 'all' and mode not in TXIN_LIST:
+			result[index] = {'status': 400, 'message': 'Error: Unsupported address type.', 'address': None}
+			continue
+		try:
+			secretkey, compressed = Privkey.deserialize(request.get('privkey', ''))
+		except:
+			result[index] = {'status': 400, 'message': 'Error: Failed to retieve address, invalid private key.', 'address': None}
+			continue
+		txins = TXIN_LIST if mode == 'all' else (mode,)
+		groups[compressed].append((index, secretkey, txins))
+
+	for compressed, group in groups.items():
+		if len(group) == 0: continue
+		count = len(group)
+		try:
+			h160s = Address.secretkey_to_hash160_many(b''.join(row[1] for row in group), count, compressed=compressed)
+			columns = {txin: Address.from_hash160_many(h160s, count, txin)
+						for txin in TXIN_LIST if any(txin in row[2] for row in group)}
+		except:
+			for index, _, _ in group:
+				result[index] = {'status': 400, 'message': 'Error: Failed to retieve address, invalid private key.', 'address': None}
+			continue
+		for position, (index, _, txins) in enumerate(group):
+			address = {txin: columns[txin][position] for txin in txins}
+			result[index] = {'status': 200, 'message': 'Retrieve address complete.', 'address': address}
+	return result
+
+def _with_id(request: dict, response: dict) -> dict:
+	# Echoes the id of a request, if any, so clients can match responses.
+	if 'id' not in request: return response
+	return dict(response, id=request['id'])
+
+OPERATIONS = {'sign': _sign_batch, 'verify': _verify_batch, 'address': _address_batch}
+
+class MicroBatcher:
+
+	def __init__(self, operations: dict = None, max_batch: int = 64, max_wait: float = 0.002, workers: int = 0):
+		# Coalesces submitted requests into batches. A batch is dispatched
+		# once it holds max_batch requests or max_wait seconds after its
+		# first request arrived. At most two batches per worker are in
+		# flight, so when the pool is busy requests keep queueing and the
+		# next batch fills up instead of adding tasks.
+		self.operations = operations if operations != None else OPERATIONS
+		self.max_batch = max(1, max_batch)
+		self.max_wait = max(0.0, max_wait)
+		self.workers = workers if workers > 0 else (os.cpu_count() or 1)
+		self._queue = queue.Queue()
+		self._inflight = threading.BoundedSemaphore(self.workers * 2)
+		self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='simplewallet-batch')
+		self._dispatcher = threading.Thread(target=self._dispatch, name='simplewallet-dispatch', daemon=True)
+		self._closed = False
+		self._dispatcher.start()
+
+	def submit(self, request: dict) -> Future:
+		# Queues one request, the future resolves to its response dict.
+		future = Future()
+		op = request.get('op')
+		if not isinstance(op, str) or op not in self.operations:
+			future.set_result(_with_id(request, {'status': 400, 'message': 'Error: Unsupported operation.'}))
+		elif self._closed:
+			future.set_result(_with_id(request, {'status': 400, 'message': 'Error: Service is shutting down.'}))
+		else:
+			self._queue.put((op, request, future))
+		return future
+
+	def request(self, request: dict, timeout: float = None) -> dict:
+		return self.submit(request).result(timeout)
+
+	def close(self):
+		# Stops accepting requests, answers the queued ones and waits for the
+		# batches in flight.
+		self._closed = True
+		self._queue.put(None)
+		self._dispatcher.join()
+		self._executor.shutdown(wait=True)
+
+	def _dispatch(self):
+		while True:
+			item = self._queue.get()
+			if item == None: return
+			batch = [item]
+			deadline = time.monotonic() + self.max_wait
+			stop = False
+			while len(batch) < self.max_batch:
+				try:
+					item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+				except queue.Empty:
+					break
+				if item == None:
+					stop = True
+					break
+				batch.append(item)
+			self._inflight.acquire()
+			self._executor.submit(self._run, batch)
+			if stop: return
+
+	def _run(self, batch: list):
+		try:
+			groups = {}
+			for op, request, future in batch:
+				groups.setdefault(op, []).append((request, future))
+			for op, group in groups.items():
+				try:
+					responses = self.operations[op]([request for request, _ in group])
+				except Exception:
+					responses = [{'status': 400, 'message': 'Error: Request failed.'}] * len(group)
+				for (request, future), response in zip(group, responses):
+					future.set_result(_with_id(request, response))
+		finally:
+			self._inflight.release()
+
+	def warm_up(self):
+		# Loads the libsecp256k1 contexts and caches before the first request.
+		privkey = Privkey.generate()
+		signer = self.request({'op': 'sign', 'privkey': privkey, 'message': 'simplewallet'})
+		address = self.request({'op': 'address', 'privkey': privkey})['address']['p2wpkh']
+		self.request({'op': 'verify', 'address': address, 'signature': signer['signature'], 'message': 'simplewallet'})
+
+def _decode(data: bytes):
+	try:
+		return json.loads(data)
+	except:
+		return None
+
+class _UnixHandler(socketserver.StreamRequestHandler):
+	# One JSON request per line, answered by one JSON line in order. Lines
+	# are submitted as they arrive and answered by a writer thread as their
+	# futures resolve, so a client that pipelines requests has them batched
+	# together. At most max_pending requests are waiting for their answer.
+	max_pending = 1024
+
+	def handle(self):
+		pending = queue.Queue(self.max_pending)
+		writer = threading.Thread(target=self._write, args=(pending,), name='simplewallet-writer', daemon=True)
+		writer.start()
+		try:
+			for line in self.rfile:
+				if line.strip() == b'': continue
+				request = _decode(line)
+				if not isinstance(request, dict):
+					future = Future()
+					future.set_result({'status': 400, 'message': 'Error: Request must be a JSON object.'})
+				else:
+					future = self.server.batcher.submit(request)
+				pending.put(future)
+		finally:
+			pending.put(None)
+			writer.join()
+
+	def _write(self, pending: queue.Queue):
+		# Once the client is gone the remaining answers are still awaited,
+		# only not written, so the reader never blocks on a full queue.
+		connected = True
+		while True:
+			future = pending.get()
+			if future == None: return
+			response = future.result()
+			if not connected: continue
+			try:
+				self.wfile.write(json.dumps(response).encode('utf8') + b'\n')
+				self.wfile.flush()
+			except OSError:
+				connected = False
+
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+	daemon_threads = True
+
+def _is_socket(path: str) -> bool:
+	try:
+		return stat.S_ISSOCK(os.lstat(path).st_mode)
+	except OSError:
+		return False
+
+class _HttpHandler(BaseHTTPRequestHandler):
+	# POST /<op> with a JSON object body, GET /metrics for the Stats.
+
+	def do_GET(self):
+		if self.path != '/metrics':
+			return self._reply(404, {'status': 404, 'message': 'Error: Not found.'})
+		body = Stats.prometheus().encode('utf8')
+		self.send_response(200)
+		self.send_header('Content-Type', 'text/plain; version=0.0.4')
+		self.send_header('Content-Length', str(len(body)))
+		self.end_headers()
+		self.wfile.write(body)
+
+	def do_POST(self):
+		op = self.path.strip('/')
+		try:
+			length = int(self.headers.get('Content-Length') or 0)
+		except ValueError:
+			length = -1
+		if length < 0:
+			return self._reply(400, {'status': 400, 'message': 'Error: Invalid Content-Length.'})
+		request = _decode(self.rfile.read(length))
+		if not isinstance(request, dict):
+			return self._reply(400, {'status': 400, 'message': 'Error: Request must be a JSON object.'})
+		if op not in self.server.batcher.operations:
+			return self._reply(404, {'status': 404, 'message': 'Error: Unsupported operation.'})
+		request['op'] = op
+		self._reply(200, self.server.batcher.request(request))
+
+	def _reply(self, code: int, response: dict):
+		body = json.dumps(response).encode('utf8')
+		self.send_response(code)
+		self.send_header('Content-Type', 'application/json')
+		self.send_header('Content-Length', str(len(body)))
+		self.end_headers()
+		self.wfile.write(body)
+
+	def log_message(self, format, *args):
+		pass
+
+class WalletDaemon:
+
+	def __init__(self, socket_path: str = None, host: str = '127.0.0.1', port: int = 0,
+				max_batch: int = 64, max_wait: float = 0.002, workers: int = 0, warm: bool = True):
+		# Serves the MicroBatcher over a Unix domain socket at socket_path,
+		# or over HTTP on host:port when socket_path is None. A socket left
+		# at socket_path by an earlier run is replaced, any other file there
+		# is an error rather than being removed.
+		if socket_path != None and os.path.lexists(socket_path) and not _is_socket(socket_path):
+			raise Exception('Error: {} exists and is not a socket.'.format(socket_path))
+		self.batcher = MicroBatcher(max_batch=max_batch, max_wait=max_wait, workers=workers)
+		if warm: self.batcher.warm_up()
+		self.socket_path = socket_path
+		if socket_path != None:
+			if _is_socket(socket_path): os.remove(socket_path)
+			self.server = _UnixServer(socket_path, _UnixHandler)
+		else:
+			self.server = ThreadingHTTPServer((host, port), _HttpHandler)
+			self.server.daemon_threads = True
+		self.server.batcher = self.batcher
+
+	@property
+	def address(self):
+		return self.server.server_address
+
+	def serve_forever(self):
+		try:
+			self.server.serve_forever()
+		finally:
+			self.close()
+
+	def start(self) -> threading.Thread:
+		# Serves from a background thread, for embedding and tests.
+		thread = threading.Thread(target=self.server.serve_forever, name='simplewallet-daemon', daemon=True)
+		thread.start()
+		return thread
+
+	def shutdown(self):
+		# Stops a server started with start and releases it.
+		self.server.shutdown()
+		self.close()
+
+	def close(self):
+		self.server.server_close()
+		self.batcher.close()
+		if self.socket_path != None and _is_socket(self.socket_path): os.remove(self.socket_path)
+
+def main(argv: list = None):
+	parser = argparse.ArgumentParser(prog='simplewallet-daemon', description='Sign, verify and derive addresses as a local service.')
+	parser.add_argument('--socket', help='Unix domain socket path, serves HTTP when omitted.')
+	parser.add_argument('--host', default='127.0.0.1')
+	parser.add_argument('--port', type=int, default=8337)
+	parser.add_argument('--max-batch', type=int, default=64, help='Most requests in one batch.')
+	parser.add_argument('--max-wait', type=float, default=2.0, help='Most milliseconds a batch waits to fill.')
+	parser.add_argument('--workers', type=int, default=0, help='Batch threads, one per cpu when 0.')
+	parser.add_argument('--stats', action='store_true', help='Collect stage timings, served at GET /metrics.')
+	args = parser.parse_args(argv)
+	if args.stats: Stats.enable()
+	try:
+		daemon = WalletDaemon(args.socket, args.host, args.port, args.max_batch, args.max_wait / 1000, args.workers)
+	except Exception as e:
+		print(e)
+		return 1
+	print('Serving on ' + str(daemon.address))
+	try:
+		daemon.serve_forever()
+	except KeyboardInterrupt:
+		pass
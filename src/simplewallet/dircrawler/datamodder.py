@@ -20,6 +20,9 @@
 # SOFTWARE.
 
 import csv
+import io
+import os
+from typing import Callable, Iterable, Iterator, Optional
 
 class DataModder:
 
@@ -41,6 +44,23 @@ class DataModder:
 		except:
 			return {}
 
+	@classmethod
+	def readheader(self, filepath: str) -> Optional[list]:
+		# returns ['column_name1', ...], [] if the file is empty or None if it cannot be read
+		try:
+			with open(filepath, 'r') as f:
+				return next(csv.reader(f), [])
+		except:
+			return None
+
+	@classmethod
+	def readcols(self, filepath: str, colnames: list) -> Iterator[dict]:
+		# Lazily yields {'column_name1': 'item1', ...} for every row, one row
+		# in memory at a time. Missing cells are None.
+		with open(filepath, 'r') as f:
+			for line in csv.DictReader(f):
+				yield {col: line.get(col) for col in colnames}
+
 	@classmethod
 	def createcsv(self, data: dict, outpath: str) -> dict:
 		# data = {'column_name1': ['item1','item2','item3'], ...}
@@ -69,6 +89,65 @@ class DataModder:
 		except:
 			return {'status': 400, 'message': 'Error: Failed to write data to csv.'}
 
+	@classmethod
+	def resume_csv(self, outpath: str, header: list) -> dict:
+		# Prepares a partially written csv for appending. A trailing row cut
+		# off mid-write is truncated away, and the complete data rows are
+		# counted. The file must start with header. A file that is empty, or
+		# holds only part of the header, was cut off before any row and is
+		# started over. Returns the row count in data.
+		try:
+			with open(outpath, 'rb+') as f:
+				firstline = f.readline()
+				if not firstline.endswith(b'\n'):
+					line = io.StringIO()
+					csv.writer(line).writerow(header)
+					if not line.getvalue().encode().startswith(firstline):
+						return {'status': 400, 'message': 'Error: Existing file has different columns, cannot resume.', 'data': None}
+					f.truncate(0)
+					return {'status': 200, 'message': 'Resuming {} after 0 rows.'.format(outpath), 'data': 0}
+				if next(csv.reader([firstline.decode()]), []) != header:
+					return {'status': 400, 'message': 'Error: Existing file has different columns, cannot resume.', 'data': None}
+				rows = 0; complete = f.tell(); pos = complete
+				while True:
+					block = f.read(1 << 20)
+					if len(block) == 0: break
+					rows += block.count(b'\n')
+					last = block.rfind(b'\n')
+					if last != -1: complete = pos + last + 1
+					pos += len(block)
+				if complete != pos: f.truncate(complete)
+			return {'status': 200, 'message': 'Resuming {} after {} rows.'.format(outpath, rows), 'data': rows}
+		except:
+			return {'status': 400, 'message': 'Error: Failed to read existing file.', 'data': None}
+
+	@classmethod
+	def stream_createcsv(self, header: list, rows: Iterable, outpath: str, append: bool = False,
+						checkpoint: int = 10000, count: int = 0,
+						progress: Callable[[int], None] = None) -> dict:
+		# Streaming createcsv: writes header and then every row of rows as it
+		# is produced. With append the rows are added to an existing file,
+		# see resume_csv. Every checkpoint rows the file is flushed and
+		# fsynced, so a crash loses at most the rows since the last one.
+		# count is the number of rows already in the file, progress is
+		# called with the running total at every checkpoint.
+		try:
+			with open(outpath, mode='a' if append else 'w', newline='') as f:
+				writer = csv.writer(f)
+				if not append: writer.writerow(header)
+				for row in rows:
+					writer.writerow(row)
+					count += 1
+					if checkpoint > 0 and count % checkpoint == 0:
+						f.flush(); os.fsync(f.fileno())
+						if progress != None: progress(count)
+				f.flush(); os.fsync(f.fileno())
+		except:
+			return {'status': 400, 'message': 'Error: Failed to write data to csv.'}
+
+		if progress != None: progress(count)
+		return {'status': 200, 'message': 'File created: {}'.format(outpath)}
+
 	@classmethod
 	def append_col(self, column: list, filepath: str, outpath: str) -> dict:
 		# column = ['column_name1','item1','item2','item3']
@@ -92,3 +171,34 @@ class DataModder:
 			return {'status': 200, 'message': 'File created: {}'.format(outpath)}
 		except:
 			return {'status': 400, 'message': 'Error: Failed to write data to csv.'}
+
+	@classmethod
+	def stream_append_col(self, colname: str, values: Iterable, filepath: str, outpath: str,
+						progress: Callable[[int], None] = None, every: int = 1000) -> dict:
+		# Streaming append_col: copies filepath to outpath row by row, adding
+		# colname to the header and the next item of values to every non
+		# blank row, so only the rows in flight are held in memory. values is
+		# typically computed lazily from readcols over the same file.
+		# progress is called with the number of rows written every `every`
+		# rows and once at the end.
+		values = iter(values)
+		count = 0
+		try:
+			with open(filepath, mode='r') as fin, open(outpath, mode='w', newline='') as fout:
+				file = csv.reader(fin); writer = csv.writer(fout)
+				header = next(file, None)
+				if header is None:
+					return {'status': 400, 'message': 'Error: Failed to parse data from input.'}
+				writer.writerow(header + [colname])
+				for item in file:
+					if len(item) > 0:
+						item.append(next(values, 'N/A'))
+						count += 1
+						if progress != None and count % every == 0: progress(count)
+					writer.writerow(item)
+		except:
+			if os.path.exists(outpath): os.remove(outpath)
+			return {'status': 400, 'message': 'Error: Failed to write data to csv.'}
+
+		if progress != None: progress(count)
+		return {'status': 200, 'message': 'File created: {}'.format(outpath)}
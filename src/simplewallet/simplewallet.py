@@ -19,59 +19,143 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
+import os
+from itertools import chain
+from typing import Callable
 from .bitcoin.address import Address
-from .bitcoin.helper import TXIN_LIST
+from .bitcoin.addressindex import AddressIndex
+from .bitcoin.helper import cached_magic_hd, magic_hd, magic_template, TXIN_LIST
 from .bitcoin.privkey import Privkey
 from .bitcoin.signer import Signer
 from .bitcoin.verifier import Verifier
 from .dircrawler.datamodder import DataModder
 from .dircrawler.filemodder import FileModder
 from .utils.commoncmd import CommonCmd as cmd
+from .utils.conversion import to_bytes
+from .utils.profiler import Profiler
+from .utils.workerpool import WorkerPool
+
+def _generate_keypair(txins: tuple, compressed: bool = True) -> tuple:
+	# Generates (privkey, {txin: address}) from one secretkey. Addresses are
+	# derived from the secret directly and the WIF is encoded once for output,
+	# rather than decoding the WIF again for every txin.
+	secretkey = Privkey.generate_secretkey()
+	address = Address.from_secretkey(secretkey, txins, compressed=compressed)
+	privkey, _ = Privkey.serialize(secretkey, compressed)
+	return privkey, address
+
+def _wallet_rows(job: tuple) -> list:
+	# Generates a batch of (txins, num) wallet csv rows: an address for every
+	# txin, then the privkey. The pubkeys of the batch are hashed together
+	# and its Base58Check privkeys and p2pkh addresses encoded together.
+	txins, num = job
+	secretkeys = b''.join(Privkey.generate_secretkey() for _ in range(num))
+	h160s = Address.secretkey_to_hash160_many(secretkeys, num)
+	columns = [Address.from_hash160_many(h160s, num, txin) for txin in txins]
+	columns.append(Privkey.serialize_many(secretkeys, num, True))
+	return [list(row) for row in zip(*columns)]
+
+def _batches(num: int, size: int):
+	# Splits num rows into batch sizes of at most size.
+	size = max(1, size)
+	for start in range(0, num, size):
+		yield min(size, num - start)
+
+def _template_hash(message: str, template: tuple) -> bytes:
+	# magic_hd of the templated message, from the midstate of its prefix.
+	prefix, trailing = template
+	return magic_template(to_bytes(prefix, 'utf8')).hash(to_bytes(message + trailing, 'utf8'))
+
+def _sign_row(row: tuple) -> str:
+	# Signs one (privkey, message, msg_hash, template) row of sign_bulk,
+	# returns the column value. msg_hash is None unless the message is shared
+	# by the job, template is None or the (prefix, trailing) around message.
+	privkey, message, msg_hash, template = row
+	if template != None and message: msg_hash = _template_hash(message, template)
+	signer = Signer.sign_message(privkey, message, algo=cached_magic_hd, msg_hash=msg_hash)
+	if signer['status'] == 401: return ''
+	elif signer['status'] == 200: return signer['signature']
+	else: return signer['message']
+
+def _verify_row(row: tuple) -> str:
+	# Verifies one (method, address, privkey, signature, message, msg_hash,
+	# template) row of verify_bulk like _sign_row, returns the column value.
+	method, address, privkey, signature, message, msg_hash, template = row
+	if method == 'signature':
+		if template != None and message: msg_hash = _template_hash(message, template)
+		verifier = Verifier.with_signature(address, signature, message, algo=cached_magic_hd, msg_hash=msg_hash)
+	else:
+		verifier = Verifier.with_privkey(address, privkey)
+
+	if verifier['status'] == 401: return ''
+	elif verifier['status'] == 200: return str(verifier['matched'])
+	else: return verifier['message']
 
 class SimpleWallet:
 
-	def get_wallet(self, num: int = 0, mode: str = 'p2wpkh') -> dict:
+	def _wallet_header(self, mode: str) -> list:
+		if mode == 'all': return ['address-'+txin for txin in TXIN_LIST] + ['privkey']
+		return ['address', 'privkey']
+
+	def get_wallet(self, num: int = 0, mode: str = 'p2wpkh', profile: bool = False, slowest: int = 10) -> dict:
+		# With profile the csv is written under cProfile and tracemalloc and
+		# a report, with the slowest batches of slowest rows, is written next
+		# to it, see Profiler.
 		if mode != 'all' and mode not in TXIN_LIST:
 			return {'status': 400, 'message': 'Error: Unsupported address type.', 'data': None}
 
+		txins = TXIN_LIST if mode == 'all' else (mode,)
+
 		if num < 0: num = 1
 		if num > 1000: num = 1000
 		if num == 0:
-			privkey = Privkey.generate()
-			address = {}
-			if mode == 'all':
-				for txin in TXIN_LIST:
-					address[txin] = Address.from_privkey(privkey, txin)
-			else:
-				address[mode] = Address.from_privkey(privkey, mode)
-
+			privkey, address = _generate_keypair(txins)
 			data = {'address': address, 'privkey': privkey}
 			return {'status': 200, 'message': 'Generate address complete.', 'data': data}
 
-		data = {}
-		if mode == 'all':
-			for txin in TXIN_LIST: data['address-'+txin] = []
-		else:
-			data['address'] = []
-		data['privkey'] = []
-
-		for _ in range(num):
-			privkey = Privkey.generate()
-			data['privkey'].append(privkey)
-
-			if mode == 'all':
-				for txin in TXIN_LIST:
-					data['address-'+txin].append(Address.from_privkey(privkey, txin))
-			else:
-				data['address'].append(Address.from_privkey(privkey, mode))
-
 		try:
 			outfile = FileModder.add_randomized_tag('wallet.csv', length=5, spliton='')
-			result = DataModder.createcsv(data, outfile)
+			profiler = Profiler(slowest, unit='batch') if profile else None
+			job = _wallet_rows if profiler == None else profiler.timed(_wallet_rows)
+			rows = chain.from_iterable(job((txins, n)) for n in _batches(num, 1000))
+			write = lambda: DataModder.stream_createcsv(self._wallet_header(mode), rows, outfile, checkpoint=0)
+			if profiler != None:
+				result = profiler.run('get_wallet', write, outfile)
+				return {'status': result['status'], 'message': result['message'], 'data': None, 'profile': result['profile']}
+			result = write()
 			return {'status': result['status'], 'message': result['message'], 'data': None}
 		except:
 			return {'status': 400, 'message': 'Error: Failed to write wallet to CSV file.', 'data': None}
 
+	def generate_bulk(self, num: int, mode: str = 'p2wpkh', outpath: str = None, workers: int = 1,
+					chunksize: int = 1000, checkpoint: int = 10000,
+					progress: Callable[[int], None] = None) -> dict:
+		# Generates num wallets into a csv without the cap of get_wallet. Rows
+		# are written as they are produced, optionally by a pool of workers
+		# processes, and the file is fsynced every checkpoint rows. If outpath
+		# already exists the run resumes it: a row cut off by a crash is
+		# dropped and only the missing rows are generated.
+		if mode != 'all' and mode not in TXIN_LIST:
+			return {'status': 400, 'message': 'Error: Unsupported address type.', 'data': None}
+		if num <= 0: return {'status': 400, 'message': 'Error: Number of wallets must be positive.', 'data': None}
+
+		txins = TXIN_LIST if mode == 'all' else (mode,)
+		header = self._wallet_header(mode)
+		if outpath == None: outpath = FileModder.add_randomized_tag('wallet.csv', length=5, spliton='')
+
+		existing = 0
+		if os.path.exists(outpath):
+			resume = DataModder.resume_csv(outpath, header)
+			if resume['status'] != 200: return {'status': 400, 'message': resume['message'], 'data': None}
+			existing = resume['data']
+			if existing >= num: return {'status': 200, 'message': 'File already complete: {}'.format(outpath), 'data': existing}
+
+		jobs = ((txins, n) for n in _batches(num - existing, chunksize))
+		rows = chain.from_iterable(WorkerPool.imap(_wallet_rows, jobs, workers=workers, chunksize=1))
+		result = DataModder.stream_createcsv(header, rows, outpath, append=existing > 0,
+											checkpoint=checkpoint, count=existing, progress=progress)
+		return {'status': result['status'], 'message': result['message'], 'data': None}
+
 	def sign_message(self, privkey: str, message: str, mode: str) -> dict:
 		if mode != 'all' and mode not in TXIN_LIST:
 			return {'status': 400, 'message': 'Error: Unsupported address type.', 'data': None}
@@ -86,9 +170,9 @@ class SimpleWallet:
 		txins = TXIN_LIST if mode == 'all' else [mode]
 
 		try:
+			h160 = Verifier.reveal_hash160(data['signature'], message)
 			for txin in txins:
-				address = Verifier.reveal_address(data['signature'], message, txin)
-				data['address'][txin] = address
+				data['address'][txin] = Address.from_hash160(h160, txin)
 			return {'status': 200, 'message': 'Signing complete.', 'data': data}
 		except:
 			return {'status': 400, 'message': 'Error: Created corrupt signature.', 'data': None}
@@ -103,27 +187,63 @@ class SimpleWallet:
 		except:
 			return {'status': 400, 'message': 'Error: Unable to read file {}'.format(filepath), 'data': None}
 
-	def sign_bulk(self, filepath: str, message: str = None) -> dict:
-		parser = self.parse_wallet_data(filepath, colnames=['privkey', 'message'])
-		if parser['status'] != 200: return {'status': 400, 'message': parser['message']}
-		privkeys = parser['data']['privkey']
-		messages = parser['data']['message']
-
-		if len(privkeys) == 0: return {'status': 400, 'message': 'Error: privkey column missing or empty.'}
-		if len(messages) == 0 and message == None: return {'status': 400, 'message': 'Error: Message missing or empty.'}
-		if len(privkeys) != len(messages) and message == None:
-			return {'status': 400, 'message': 'Error: Number of private keys and messages must be the same.'}
-
-		column = []
-		for i, _ in enumerate(privkeys):
-			signer = Signer.sign_message(privkeys[i], messages[i] if message == None else message)
-			if signer['status'] == 401: column.append('')
-			elif signer['status'] == 200: column.append(signer['signature'])
-			else: column.append(signer['message'])
-
-		column.insert(0,'signature')
+	def _read_columns(self, filepath: str) -> dict:
+		# Reads only the header of filepath, along with whether it has any
+		# data row, so bulk jobs can validate their input before streaming.
+		header = DataModder.readheader(filepath)
+		if header == None: return {'status': 400, 'message': 'Error: Failed to read file.', 'data': None}
+		try:
+			hasrows = next(DataModder.readcols(filepath, []), None) != None
+		except:
+			return {'status': 400, 'message': 'Error: Unable to read file {}'.format(filepath), 'data': None}
+		columns = header if hasrows else []
+		return {'status': 200, 'message': 'Read file complete {}'.format(filepath), 'data': columns}
+
+	def _split_template(self, template: str):
+		# Splits template at its first {} into (prefix, trailing). Returns None
+		# without a template and False if template has no {}.
+		if template == None: return None
+		if '{}' not in template: return False
+		prefix, trailing = template.split('{}', 1)
+		return (prefix, trailing)
+
+	def sign_bulk(self, filepath: str, message: str = None, workers: int = 1,
+				chunksize: int = 1000, progress: Callable[[int], None] = None, template: str = None,
+				threads: bool = False, profile: bool = False, slowest: int = 10) -> dict:
+		# Rows are streamed from filepath through a pool of workers processes
+		# (workers <= 0 uses every cpu), each handed chunksize rows at a time,
+		# and written out in the original order as they complete, so memory
+		# stays bounded for any file size. progress is called with the number
+		# of rows written so far. With a template, the message of every row is
+		# the template with its {} replaced by the message column, and only
+		# the text from {} on is hashed per row. With threads the workers are
+		# threads instead of processes, for hosts that cannot fork. With
+		# profile the rows run in this process under cProfile and tracemalloc
+		# and a report with the slowest rows, redacted, is written next to
+		# the output, its path is returned as 'profile'.
+		template = self._split_template(template)
+		if template == False: return {'status': 400, 'message': 'Error: Template must contain {}.'}
+		if template != None and message != None: return {'status': 400, 'message': 'Error: Use either a message or a template.'}
+		reader = self._read_columns(filepath)
+		if reader['status'] != 200: return {'status': 400, 'message': reader['message']}
+		columns = reader['data']
+
+		if 'privkey' not in columns: return {'status': 400, 'message': 'Error: privkey column missing or empty.'}
+		if 'message' not in columns and message == None: return {'status': 400, 'message': 'Error: Message missing or empty.'}
+
+		# A shared message is hashed once here, per-row messages through the
+		# cache of cached_magic_hd.
+		msg_hash = None if message == None else magic_hd(to_bytes(message, 'utf8'))
+		rows = ((row['privkey'], row['message'] if message == None else message, msg_hash, template)
+				for row in DataModder.readcols(filepath, ['privkey', 'message']))
+		profiler = Profiler(slowest) if profile else None
+		if profiler == None:
+			column = WorkerPool.imap(_sign_row, rows, workers=workers, chunksize=chunksize, threads=threads)
+		else:
+			column = WorkerPool.imap(profiler.timed(_sign_row), rows, workers=1, chunksize=chunksize)
 		outpath = FileModder.add_randomized_tag(filepath, length=5, spliton='-s')
-		return DataModder.append_col(column, filepath, outpath)
+		write = lambda: DataModder.stream_append_col('signature', column, filepath, outpath, progress=progress)
+		return write() if profiler == None else profiler.run('sign_bulk', write, outpath)
 
 	def verify_visual(self, instructions: dict, mode: str) -> dict:
 		if mode != 'all' and mode not in TXIN_LIST:
@@ -146,50 +266,75 @@ class SimpleWallet:
 			signature = instructions['signature']; message = instructions['message']
 
 		try:
-			for txin in txins: data[txin] = Verifier.reveal_address(signature, message, txin)
+			h160 = Verifier.reveal_hash160(signature, message)
+			for txin in txins: data[txin] = Address.from_hash160(h160, txin)
 			return {'status': 200, 'message': 'Retrieve address complete.', 'data': data}
 		except:
 			return {'status': 400, 'message': 'Error: Failed to retieve address, invalid signature.', 'data': None}
 
-	def verify_bulk(self, filepath: str, method: str = 'signature', message: str = None):
+	def verify_bulk(self, filepath: str, method: str = 'signature', message: str = None,
+					workers: int = 1, chunksize: int = 1000, progress: Callable[[int], None] = None,
+					template: str = None, threads: bool = False, profile: bool = False, slowest: int = 10,
+					timeout: float = 300):
+		# Rows are streamed like in sign_bulk, template, threads and profile
+		# are also the same. A row that fails is reported in its own cell without
+		# stopping the rest of the batch, and so is a row that crashes its worker
+		# or keeps its chunk busy for longer than timeout seconds.
 		if method != 'signature' and method != 'privkey': return {'status': 400, 'message': 'Error: Invalid verification method.'}
-		parser = self.parse_wallet_data(filepath, colnames=['address', 'privkey', 'signature', 'message'])
-		if parser['status'] != 200: return {'status': 400, 'message': parser['message']}
-		addresses = parser['data']['address']
-		privkeys = parser['data']['privkey']
-		signatures = parser['data']['signature']
-		messages = parser['data']['message']
+		template = self._split_template(template)
+		if template == False: return {'status': 400, 'message': 'Error: Template must contain {}.'}
+		if template != None and message != None: return {'status': 400, 'message': 'Error: Use either a message or a template.'}
+		reader = self._read_columns(filepath)
+		if reader['status'] != 200: return {'status': 400, 'message': reader['message']}
+		columns = reader['data']
 
-		if len(addresses) == 0: return {'status': 400, 'message': 'Error: Address column missing or empty.'}
+		if 'address' not in columns: return {'status': 400, 'message': 'Error: Address column missing or empty.'}
 
 		if method == 'signature':
-			if len(signatures) == 0: return {'status': 400, 'message': 'Error: Signature column missing or empty.'}
-			if len(messages) == 0 and message == None: return {'status': 400, 'message': 'Error: Message missing or empty.'}
-			if len(addresses) != len(signatures):
-				return {'status': 400, 'message': 'Error: Number of addresses and signatures must be the same.'}
-			if len(signatures) != len(messages) and message == None:
-				return {'status': 400, 'message': 'Error: Number of signatures and messages must be the same.'}
+			if 'signature' not in columns: return {'status': 400, 'message': 'Error: Signature column missing or empty.'}
+			if 'message' not in columns and message == None: return {'status': 400, 'message': 'Error: Message missing or empty.'}
 
 		if method == 'privkey':
-			if len(privkeys) == 0: return {'status': 400, 'message': 'Error: privkey column missing or empty.'}
-			if len(addresses) != len(privkeys):
-				return {'status': 400, 'message': 'Error: Number of addresses and private keys must be the same.'}
-
-		column = []
-		for i, _ in enumerate(addresses):
-			if method == 'signature':
-				verifier = Verifier.with_signature(addresses[i], signatures[i],
-													messages[i] if message == None else message)
-			else:
-				verifier = Verifier.with_privkey(addresses[i], privkeys[i])
+			if 'privkey' not in columns: return {'status': 400, 'message': 'Error: privkey column missing or empty.'}
+
+		msg_hash = None if message == None else magic_hd(to_bytes(message, 'utf8'))
+		rows = ((method, row['address'], row['privkey'], row['signature'],
+				row['message'] if message == None else message, msg_hash, template)
+				for row in DataModder.readcols(filepath, ['address', 'privkey', 'signature', 'message']))
+		profiler = Profiler(slowest) if profile else None
+		if profiler == None:
+			column = WorkerPool.imap(_verify_row, rows, workers=workers, chunksize=chunksize,
+									isolate=True, onerror='Error: Failed to verify row.', threads=threads, timeout=timeout)
+		else:
+			column = WorkerPool.imap(profiler.timed(_verify_row), rows, workers=1, chunksize=chunksize,
+									isolate=True, onerror='Error: Failed to verify row.')
+		outpath = FileModder.add_randomized_tag(filepath, length=5, spliton='-v')
+		write = lambda: DataModder.stream_append_col('verified-{}'.format(method), column, filepath, outpath, progress=progress)
+		return write() if profiler == None else profiler.run('verify_bulk', write, outpath)
+
+	def find_bulk(self, filepath: str, instructions: dict) -> dict:
+		# Finds every address in the address column of filepath that is
+		# controlled by instructions['privkey'], or by instructions['signature']
+		# and instructions['message'], in one pass over an AddressIndex.
+		parser = self.parse_wallet_data(filepath, colnames=['address'])
+		if parser['status'] != 200: return {'status': 400, 'message': parser['message'], 'data': None}
+		addresses = parser['data']['address']
+		if len(addresses) == 0: return {'status': 400, 'message': 'Error: Address column missing or empty.', 'data': None}
 
-			if verifier['status'] == 401: column.append('')
-			elif verifier['status'] == 200: column.append(str(verifier['matched']))
-			else: column.append(verifier['message'])
+		keys = instructions.keys()
+		try:
+			index = AddressIndex(addresses)
+			if 'privkey' in keys:
+				rows = index.with_privkey(instructions['privkey'])
+			elif 'signature' in keys and 'message' in keys:
+				rows = index.with_signature(instructions['signature'], instructions['message'])
+			else:
+				return {'status': 400, 'message': 'Error: Privkey or signature and message missing from input.', 'data': None}
+		except:
+			return {'status': 400, 'message': 'Error: Invalid private key or signature, no action taken.', 'data': None}
 
-		column.insert(0,'verified-{}'.format(method))
-		outpath = FileModder.add_randomized_tag(filepath, length=5, spliton='-v')
-		return DataModder.append_col(column, filepath, outpath)
+		data = [{'row': row, 'address': addresses[row], 'txin': index.record(row).txin} for row in rows]
+		return {'status': 200, 'message': 'Found {} matching address(es).'.format(len(data)), 'data': data}
 
 class SimpleWalletGUI:
 
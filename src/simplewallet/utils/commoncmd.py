@@ -19,7 +19,7 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
-import shlex; import subprocess
+import shutil; import sys
 from os import getcwd, listdir
 from os.path import isfile, isdir
 from ..dircrawler.crawler import Crawler
@@ -28,16 +28,11 @@ class CommonCmd:
 
 	@classmethod
 	def pwd(self, internal: bool = False) -> str:
-		if internal: return Crawler.posixize(getcwd())
-
-		command = 'pwd'
-		process = subprocess.run(command,
-			stdout=subprocess.PIPE,stderr=subprocess.PIPE)
-		returncode = process.returncode
-		result = Crawler.posixize(process.stdout.decode().rstrip('\n'))
-		if returncode == 0:
-			return result
-		else:
+		# Read in process, the pwd command printed the same physical path.
+		# internal is kept for callers that still pass it.
+		try:
+			return Crawler.posixize(getcwd())
+		except OSError:
 			return ''
 
 	@classmethod
@@ -50,19 +45,21 @@ class CommonCmd:
 
 	@classmethod
 	def clear(self):
-		subprocess.call('clear')
+		# Writes the escape sequences of the clear command: cursor home, erase
+		# screen and erase scrollback. Nothing is written when stdout is not
+		# a terminal, so redirected output stays clean.
+		if not sys.stdout.isatty(): return
+		sys.stdout.write('\033[H\033[2J\033[3J')
+		sys.stdout.flush()
 
 	@classmethod
 	def copyfile(self, curr_filepath: str, new_filepath: str) -> dict:
+		# Copies contents and permission bits like cp, without a subprocess.
+		cfile = Crawler.posixize(curr_filepath)
+		nfile = Crawler.posixize(new_filepath)
 
-		cfile = Crawler.escape(Crawler.posixize(curr_filepath))
-		nfile = Crawler.escape(Crawler.posixize(new_filepath))
-
-		command = shlex.split('cp {c} {n}'.format(c=cfile,n=nfile))
-		process = subprocess.run(command,
-			stdout=subprocess.PIPE,stderr=subprocess.PIPE)
-		returncode = process.returncode
-		if returncode == 0:
+		try:
+			shutil.copy(cfile, nfile)
 			return {'status': 200, 'message': 'File created: ' + str(new_filepath)}
-		else:
+		except:
 			return {'status': 400, 'message': 'Error creating file for: ' + str(curr_filepath)}
\ No newline at end of file
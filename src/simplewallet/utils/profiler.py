@@ -0,0 +1,129 @@
+# Simple Wallet
+# Copyright (c) 2023 Arctic Technology
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import heapq
+import io
+import time
+import tracemalloc
+from itertools import count
+from typing import Any, Callable
+from ..dircrawler.crawler import Crawler
+
+def _redact(value: Any) -> Any:
+	# Keeps the shape of a row but none of its contents: strings and bytes
+	# become their length, tuples are redacted item by item.
+	if value == None or isinstance(value, (bool, int, float)): return value
+	if isinstance(value, str): return '<{} chars>'.format(len(value))
+	if isinstance(value, (bytes, bytearray)): return '<{} bytes>'.format(len(value))
+	if isinstance(value, (tuple, list)): return tuple(_redact(item) for item in value)
+	return '<{}>'.format(type(value).__name__)
+
+class Profiler:
+
+	def __init__(self, slowest: int = 10, unit: str = 'row', top: int = 25):
+		# Profiles one bulk job with cProfile and tracemalloc and keeps the
+		# slowest rows of the job, redacted. Rows are numbered from 1 in the
+		# order they are read from the input file.
+		self.slowest = max(0, slowest)
+		self.unit = unit
+		self.top = top
+		self.rows = []
+		self._index = count(1)
+
+	def timed(self, func: Callable) -> Callable:
+		# func timing every call and keeping the slowest. The rows must run
+		# in this process, where cProfile and tracemalloc are active.
+		def wrapper(row):
+			index = next(self._index)
+			start = time.perf_counter()
+			try:
+				return func(row)
+			finally:
+				self._keep(time.perf_counter() - start, index, row)
+		return wrapper
+
+	def _keep(self, seconds: float, index: int, row: Any):
+		if self.slowest == 0: return
+		if len(self.rows) < self.slowest:
+			heapq.heappush(self.rows, (seconds, index, _redact(row)))
+		elif seconds > self.rows[0][0]:
+			heapq.heapreplace(self.rows, (seconds, index, _redact(row)))
+
+	@classmethod
+	def report_path(self, outpath: str) -> str:
+		# The report is written next to the output file, named after it.
+		return Crawler.joinpath(Crawler.get_rootdir(outpath), Crawler.get_prefix(outpath) + '-profile.txt')
+
+	def run(self, job: str, func: Callable[[], dict], outpath: str) -> dict:
+		# Runs func under the profilers and writes the report next to
+		# outpath. The result of func is returned with the report path
+		# added as 'profile'. The profilers are imported here, only profiled
+		# jobs pay for them.
+		import cProfile
+		tracing = tracemalloc.is_tracing()
+		if not tracing: tracemalloc.start()
+		elif hasattr(tracemalloc, 'reset_peak'): tracemalloc.reset_peak()
+		profile = cProfile.Profile()
+		start = time.perf_counter()
+		profile.enable()
+		try:
+			result = func()
+		finally:
+			profile.disable()
+			elapsed = time.perf_counter() - start
+			_, peak = tracemalloc.get_traced_memory()
+			snapshot = tracemalloc.take_snapshot()
+			if not tracing: tracemalloc.stop()
+
+		reportpath = self.report_path(outpath)
+		try:
+			with open(reportpath, 'w') as f:
+				f.write(self._report(job, result, elapsed, peak, profile, snapshot))
+			result = dict(result, profile=reportpath)
+		except:
+			result = dict(result, profile=None)
+		return result
+
+	def _report(self, job: str, result: dict, elapsed: float, peak: int,
+				profile, snapshot: tracemalloc.Snapshot) -> str:
+		import pstats
+		lines = ['SimpleWallet profile: {}'.format(job),
+				'Result: {} {}'.format(result.get('status'), result.get('message')),
+				'Time: {:.3f} s'.format(elapsed),
+				'Peak memory: {:.1f} KiB'.format(peak / 1024), '']
+
+		lines.append('Slowest (inputs redacted):')
+		for seconds, index, row in sorted(self.rows, reverse=True):
+			lines.append('  {} {:>8}  {:>10.3f} ms  {}'.format(self.unit, index, seconds * 1000, row))
+		lines.append('')
+
+		stream = io.StringIO()
+		stats = pstats.Stats(profile, stream=stream)
+		stats.sort_stats('cumulative').print_stats(self.top)
+		lines.append('Top functions (cumulative):')
+		lines.append(stream.getvalue().strip('\n'))
+		lines.append('')
+
+		lines.append('Allocations by line:')
+		snapshot = snapshot.filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)])
+		for stat in snapshot.statistics('lineno')[:self.top]:
+			lines.append('  {}'.format(stat))
+		return '\n'.join(lines) + '\n'
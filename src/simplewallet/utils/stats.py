@@ -0,0 +1,196 @@
+# Simple Wallet
+# Copyright (c) 2023 Arctic Technology
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# Opt-in counters and timers for the stages of the sign and verify
+# pipelines. Nothing is instrumented until Stats.enable(): it replaces the
+# classmethods of STAGES with timed wrappers and Stats.disable() puts the
+# originals back, so a disabled build runs the original code unchanged.
+# Every thread records into its own table, a snapshot sums the tables.
+# Only the calling process is measured, not the workers of a process pool.
+
+import importlib
+import threading
+import time
+from typing import Iterable, Iterator
+
+# (stage, module, class, method). The csv stages count rows and their time
+# excludes the time spent producing the rows that are written.
+STAGES = [
+	('privkey.deserialize', 'simplewallet.bitcoin.privkey', 'Privkey', 'deserialize'),
+	('pubkey.from_secretkey', 'simplewallet.bitcoin.pubkey', 'Pubkey', 'from_secretkey'),
+	('pubkey.from_signature65', 'simplewallet.bitcoin.pubkey', 'Pubkey', 'from_signature65'),
+	('hash160.hash', 'simplewallet.crypto.hash160', 'Hash160', 'hash'),
+	('hash160.hash_many', 'simplewallet.crypto.hash160', 'Hash160', 'hash_many'),
+	('base.encode', 'simplewallet.crypto.base', 'Base', 'encode'),
+	('base.encode_check_many', 'simplewallet.crypto.base', 'Base', 'encode_check_many'),
+	('bech32.encode', 'simplewallet.crypto.bech32', 'Bech32', 'encode'),
+	('csv.read', 'simplewallet.dircrawler.datamodder', 'DataModder', 'readcols'),
+	('csv.write', 'simplewallet.dircrawler.datamodder', 'DataModder', 'stream_createcsv'),
+	('csv.write', 'simplewallet.dircrawler.datamodder', 'DataModder', 'stream_append_col'),
+]
+
+_lock = threading.Lock()
+_local = threading.local()
+_tables = []
+_patched = []
+
+def _table() -> dict:
+	# {stage: [count, seconds, errors]} of the calling thread.
+	table = getattr(_local, 'table', None)
+	if table == None:
+		table = _local.table = {}
+		with _lock: _tables.append(table)
+	return table
+
+def _record(stage: str, count: int, seconds: float, error: bool = False):
+	entry = _table().get(stage)
+	if entry == None: entry = _local.table[stage] = [0, 0.0, 0]
+	entry[0] += count
+	entry[1] += seconds
+	if error: entry[2] += 1
+
+def _timed(stage: str, func):
+	def wrapper(cls, *args, **kwargs):
+		start = time.perf_counter()
+		try:
+			result = func(cls, *args, **kwargs)
+		except:
+			_record(stage, 1, time.perf_counter() - start, True)
+			raise
+		_record(stage, 1, time.perf_counter() - start)
+		return result
+	return wrapper
+
+def _timed_read(stage: str, func):
+	# Times every row pulled from the generator returned by func.
+	def wrapper(cls, *args, **kwargs):
+		iterator = func(cls, *args, **kwargs)
+		while True:
+			start = time.perf_counter()
+			try:
+				row = next(iterator)
+			except StopIteration:
+				_record(stage, 0, time.perf_counter() - start)
+				return
+			except:
+				_record(stage, 0, time.perf_counter() - start, True)
+				raise
+			_record(stage, 1, time.perf_counter() - start)
+			yield row
+	return wrapper
+
+class _Producer:
+	# Iterator over the rows handed to a csv writer, timing the rows it
+	# produces so the writer can subtract that time.
+	def __init__(self, rows: Iterable):
+		self.rows = iter(rows)
+		self.count = 0
+		self.seconds = 0.0
+
+	def __iter__(self) -> Iterator:
+		return self
+
+	def __next__(self):
+		start = time.perf_counter()
+		try:
+			row = next(self.rows)
+		finally:
+			self.seconds += time.perf_counter() - start
+		self.count += 1
+		return row
+
+def _timed_write(stage: str, func):
+	# The rows (or column values) are the second argument of the writers.
+	def wrapper(cls, first, rows, *args, **kwargs):
+		producer = _Producer(rows)
+		start = time.perf_counter()
+		try:
+			result = func(cls, first, producer, *args, **kwargs)
+		except:
+			_record(stage, producer.count, time.perf_counter() - start - producer.seconds, True)
+			raise
+		error = not isinstance(result, dict) or result.get('status') != 200
+		_record(stage, producer.count, time.perf_counter() - start - producer.seconds, error)
+		return result
+	return wrapper
+
+class Stats:
+
+	@classmethod
+	def enabled(self) -> bool:
+		return len(_patched) > 0
+
+	@classmethod
+	def enable(self):
+		# Instruments every stage, counting from the current totals.
+		with _lock:
+			if len(_patched) > 0: return
+			for stage, module, owner, method in STAGES:
+				owner = getattr(importlib.import_module(module), owner)
+				original = owner.__dict__[method]
+				if stage == 'csv.read': wrap = _timed_read
+				elif stage == 'csv.write': wrap = _timed_write
+				else: wrap = _timed
+				setattr(owner, method, classmethod(wrap(stage, original.__func__)))
+				_patched.append((owner, method, original))
+
+	@classmethod
+	def disable(self):
+		# Restores the original methods, the totals are kept.
+		with _lock:
+			while len(_patched) > 0:
+				owner, method, original = _patched.pop()
+				setattr(owner, method, original)
+
+	@classmethod
+	def reset(self):
+		with _lock:
+			for table in _tables: table.clear()
+
+	@classmethod
+	def snapshot(self) -> dict:
+		# {stage: {'count': n, 'seconds': s, 'errors': e}} summed over threads.
+		# count is calls, or rows for the csv stages.
+		result = {}
+		with _lock: tables = list(_tables)
+		for table in tables:
+			for stage, entry in list(table.items()):
+				count, seconds, errors = entry
+				total = result.setdefault(stage, {'count': 0, 'seconds': 0.0, 'errors': 0})
+				total['count'] += count
+				total['seconds'] += seconds
+				total['errors'] += errors
+		return result
+
+	@classmethod
+	def prometheus(self, snapshot: dict = None) -> str:
+		# Snapshot in the Prometheus text exposition format.
+		if snapshot == None: snapshot = self.snapshot()
+		lines = []
+		metrics = [('simplewallet_stage_count_total', 'count', 'Calls of a stage, rows for the csv stages.'),
+				('simplewallet_stage_seconds_total', 'seconds', 'Cumulative seconds spent in a stage.'),
+				('simplewallet_stage_errors_total', 'errors', 'Calls of a stage that failed.')]
+		for name, field, description in metrics:
+			lines.append('# HELP {} {}'.format(name, description))
+			lines.append('# TYPE {} counter'.format(name))
+			for stage in sorted(snapshot):
+				lines.append('{}{{stage="{}"}} {}'.format(name, stage, repr(snapshot[stage][field])))
+		return '\n'.join(lines) + '\n'
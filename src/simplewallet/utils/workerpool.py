@@ -0,0 +1,178 @@
+# Worker Pool
+# Copyright (c) 2023 Arctic Technology
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import concurrent.futures
+import os
+from collections import deque
+from itertools import islice
+from typing import Any, Callable, Iterable, Iterator
+
+def _apply_chunk(func: Callable, chunk: list, isolate: bool, onerror: Any) -> list:
+	# Runs func over a chunk. When isolated, an item that raises yields
+	# onerror instead of failing the whole chunk.
+	if not isolate:
+		return [func(item) for item in chunk]
+	result = []
+	for item in chunk:
+		try:
+			result.append(func(item))
+		except Exception:
+			result.append(onerror)
+	return result
+
+class WorkerPool:
+
+	@classmethod
+	def get_workers(self, workers: int) -> int:
+		# workers <= 0 means one worker per available cpu.
+		if workers > 0: return workers
+		return os.cpu_count() or 1
+
+	@classmethod
+	def _chunks(self, items: Iterable, chunksize: int):
+		iterator = iter(items)
+		while True:
+			chunk = list(islice(iterator, chunksize))
+			if len(chunk) == 0: return
+			yield chunk
+
+	@classmethod
+	def map(self, func: Callable, items: Iterable, workers: int = 1, chunksize: int = 1000,
+			isolate: bool = False, onerror: Any = None, threads: bool = False, timeout: float = None) -> list:
+		# Applies func to every item and returns the results in input order,
+		# see imap.
+		return list(self.imap(func, items, workers, chunksize, isolate, onerror, threads, timeout))
+
+	@classmethod
+	def imap(self, func: Callable, items: Iterable, workers: int = 1, chunksize: int = 1000,
+			isolate: bool = False, onerror: Any = None, threads: bool = False, timeout: float = None) -> Iterator:
+		# Lazily applies func to every item and yields the results in input
+		# order. With more than one worker the items are split into chunks of
+		# chunksize and dispatched to a pool of processes, so func must be
+		# a module level function. With threads the pool is a pool of threads
+		# instead, for callers that cannot fork and for work that releases the
+		# GIL such as the libsecp256k1 calls. At most two chunks per worker are
+		# in flight at a time, which bounds memory for any number of items.
+		# With isolate, a failing item yields onerror and the rest of the
+		# batch carries on. So does an item whose worker crashes, or that
+		# keeps its chunk from finishing within timeout seconds of being
+		# waited for: the pool is replaced, the chunk is run again on its own
+		# and then item by item to find the item to blame, and the other
+		# chunks in flight are resubmitted. A hung thread cannot be stopped,
+		# only abandoned, so timeout is meant for the process pool.
+		workers = self.get_workers(workers)
+		if chunksize < 1: chunksize = 1
+		if workers == 1:
+			for chunk in self._chunks(items, chunksize):
+				yield from _apply_chunk(func, chunk, isolate, onerror)
+			return
+
+		pool = _Pool(workers, threads)
+		pending = deque()
+		try:
+			for chunk in self._chunks(items, chunksize):
+				pending.append([chunk, self._submit(pool, func, chunk, isolate, onerror)])
+				if len(pending) >= workers * 2:
+					yield from self._collect(pool, pending, func, isolate, onerror, timeout)
+			while len(pending) > 0:
+				yield from self._collect(pool, pending, func, isolate, onerror, timeout)
+		finally:
+			pool.shutdown()
+
+	@classmethod
+	def _submit(self, pool: '_Pool', func: Callable, chunk: list, isolate: bool, onerror: Any):
+		# Returns the future of chunk, or None if the pool is already broken
+		# by a crashed worker, which _collect then deals with.
+		try:
+			return pool.submit(func, chunk, isolate, onerror)
+		except concurrent.futures.BrokenExecutor:
+			if not isolate: raise
+			return None
+
+	@classmethod
+	def _collect(self, pool: '_Pool', pending: deque, func: Callable, isolate: bool, onerror: Any,
+				timeout: float) -> list:
+		chunk, future = pending.popleft()
+		try:
+			if future == None: raise concurrent.futures.BrokenExecutor()
+			return future.result(timeout)
+		except (concurrent.futures.BrokenExecutor, concurrent.futures.TimeoutError):
+			if not isolate: raise
+		except Exception:
+			if not isolate: raise
+			return [onerror] * len(chunk)
+
+		# Every chunk still in flight is lost with the pool. The chunk is run
+		# alone first, so that it is only blamed if it fails by itself, then
+		# the lost chunks are resubmitted.
+		pool.restart()
+		result = self._run_alone(pool, func, chunk, isolate, onerror, timeout)
+		for entry in pending:
+			if not self._completed(entry[1]): entry[1] = self._submit(pool, func, entry[0], isolate, onerror)
+		return result
+
+	@classmethod
+	def _run_alone(self, pool: '_Pool', func: Callable, chunk: list, isolate: bool, onerror: Any,
+				timeout: float) -> list:
+		# Runs chunk as the only work of the pool. If it still crashes or
+		# times out, its items are run one at a time and only the failing
+		# ones yield onerror.
+		try:
+			return pool.submit(func, chunk, isolate, onerror).result(timeout)
+		except (concurrent.futures.BrokenExecutor, concurrent.futures.TimeoutError):
+			pool.restart()
+		if len(chunk) == 1: return [onerror]
+		result = []
+		for item in chunk: result.extend(self._run_alone(pool, func, [item], isolate, onerror, timeout))
+		return result
+
+	@classmethod
+	def _completed(self, future) -> bool:
+		# Whether future already holds the result of its chunk.
+		return future != None and future.done() and not future.cancelled() and future.exception() == None
+
+class _Pool:
+	# The executor of one imap call, replaced by restart when a worker
+	# crashed or a chunk timed out.
+
+	def __init__(self, workers: int, threads: bool):
+		# concurrent.futures imports the pool classes, and multiprocessing
+		# with them, on first access rather than with the package.
+		self.workers = workers
+		self.executor_class = concurrent.futures.ThreadPoolExecutor if threads else concurrent.futures.ProcessPoolExecutor
+		self.executor = self.executor_class(max_workers=workers)
+
+	def submit(self, func: Callable, chunk: list, isolate: bool, onerror: Any) -> concurrent.futures.Future:
+		return self.executor.submit(_apply_chunk, func, chunk, isolate, onerror)
+
+	def restart(self):
+		# Stops the worker processes, a hung one included, and starts a new
+		# executor. Threads are left to finish on their own.
+		for process in list((getattr(self.executor, '_processes', None) or {}).values()):
+			try:
+				process.terminate()
+			except:
+				pass
+		self.executor.shutdown(wait=False)
+		self.executor = self.executor_class(max_workers=self.workers)
+
+	def shutdown(self):
+		self.executor.shutdown(wait=True)
@@ -1,5 +1,28 @@
 #!/usr/bin/python3 -B
+import asyncio
+import csv
+import json
+import os
+import socket
+import tempfile
+import time
 from simplewallet import *
+from simplewallet.utils.workerpool import WorkerPool
+from simplewallet.crypto.base import Base
+from simplewallet.bitcoin.privkey import Privkey
+from simplewallet.crypto.hash160 import Hash160
+from simplewallet.daemon import MicroBatcher, WalletDaemon
+from simplewallet.utils.profiler import Profiler
+from simplewallet.dircrawler.datamodder import DataModder
+
+# Run in WorkerPool processes, so kept at module level.
+def _crash_on_five(item):
+	if item == 5: os._exit(1)
+	return item * 2
+
+def _hang_on_five(item):
+	if item == 5: time.sleep(60)
+	return item * 2
 
 class UnitTest:
 
@@ -87,6 +110,219 @@ class UnitTest:
 		result = {'status': verify['status'], 'result': verify['matched']}
 		return self._check(test_condition, result, expected_result)
 
+	def test_condition_7(self):
+		test_condition = 'Address.from_secretkey()'
+		expected_data = {'p2pkh': '17f3VujqtLS4iWhdiDUVFmV2btTmHWSDit',
+						'p2wpkh': 'bc1qfyp2t96wgekalv30y8w9pnzhcq7rr8k5409zq9'}
+		expected_result = {'result': expected_data}
+
+		privkey = 'KxL45a866ZnetmhpU2oBQbVv7ZwnJBsBCEMMWusfb24YdvKYFbBJ'
+		secretkey, compressed = Privkey.deserialize(privkey)
+		address = Address.from_secretkey(secretkey, ('p2pkh', 'p2wpkh'), compressed=compressed)
+		result = {'result': address}
+		return self._check(test_condition, result, expected_result)
+
+	def test_condition_8(self):
+		test_condition = 'WorkerPool.map()'
+		expected_data = [1, None, 3, None, 5]
+		expected_result = {'result': expected_data}
+
+		items = ['1', 'x', '3', '', '5']
+		mapped = WorkerPool.map(int, items, workers=2, chunksize=2, isolate=True, onerror=None)
+		result = {'result': mapped}
+		return self._check(test_condition, result, expected_result)
+
+	def test_condition_9(self):
+		test_condition = 'AddressIndex.with_privkey()'
+		expected_data = [1, 3]
+		expected_result = {'result': expected_data}
+
+		privkey = 'KxL45a866ZnetmhpU2oBQbVv7ZwnJBsBCEMMWusfb24YdvKYFbBJ'
+		addresses = ['bc1q3gvzwanemg6yxnwrxsfst6wj6e40mz2r40npfn',
+					'bc1qfyp2t96wgekalv30y8w9pnzhcq7rr8k5409zq9',
+					'not an address',
+					'17f3VujqtLS4iWhdiDUVFmV2btTmHWSDit']
+		index = AddressIndex(addresses)
+		result = {'result': index.with_privkey(privkey)}
+		return self._check(test_condition, result, expected_result)
+
+	def test_condition_10(self):
+		test_condition = 'Base.decode_check_many()'
+		expected_data = [['KxL45a866ZnetmhpU2oBQbVv7ZwnJBsBCEMMWusfb24YdvKYFbBJ'], [True, False]]
+		expected_result = {'result': expected_data}
+
+		privkey = 'KxL45a866ZnetmhpU2oBQbVv7ZwnJBsBCEMMWusfb24YdvKYFbBJ'
+		payloads, valid = Base.decode_check_many([privkey, privkey[:-1] + 'K'], 34)
+		privkeys = Privkey.serialize_many(payloads[1:33], 1, True)
+		result = {'result': [privkeys, valid]}
+		return self._check(test_condition, result, expected_result)
+
+	def test_condition_11(self):
+		test_condition = 'Hash160.hash_many()'
+		expected_data = '4ee1a90caa1874aa7dd2e0013a6da5cd7844aec526cc753b86af0a1a23d648e3970b1d794ca6c1b5'
+		expected_result = {'result': expected_data}
+
+		pubkeys = bytes([2]) + bytes(range(32)) + bytes([3]) + bytes(range(32, 64))
+		result = {'result': Hash160.hash_many(pubkeys, 2, 33).hex()}
+		return self._check(test_condition, result, expected_result)
+
+	def test_condition_12(self):
+		test_condition = 'Verifier.with_signature_many()'
+		expected_data = [True, False, None]
+		expected_result = {'result': expected_data}
+
+		privkey = 'KxL45a866ZnetmhpU2oBQbVv7ZwnJBsBCEMMWusfb24YdvKYFbBJ'
+		address = 'bc1qfyp2t96wgekalv30y8w9pnzhcq7rr8k5409zq9'
+		signature = Signer.sign_message_many([(privkey, 'hello')], workers=2)[0]['signature']
+		rows = [(address, signature, 'hello'), (address, signature, 'world'), (address, 'invalid', 'hello')]
+		verifiers = Verifier.with_signature_many(rows, workers=2)
+		result = {'result': [verifier['matched'] for verifier in verifiers]}
+		return self._check(test_condition, result, expected_result)
+
+	def test_condition_13(self):
+		test_condition = 'AsyncSimpleWallet.verify_visual()'
+		expected_data = {'p2pkh': '17f3VujqtLS4iWhdiDUVFmV2btTmHWSDit', 'p2wpkh': 'bc1qfyp2t96wgekalv30y8w9pnzhcq7rr8k5409zq9'}
+		expected_result = {'result': expected_data}
+
+		async def verify():
+			async with AsyncSimpleWallet(max_workers=2) as wallet:
+				instructions = {'privkey': 'KxL45a866ZnetmhpU2oBQbVv7ZwnJBsBCEMMWusfb24YdvKYFbBJ'}
+				return await wallet.verify_visual(instructions, 'all')
+		result = {'result': asyncio.run(verify())['data']}
+		return self._check(test_condition, result, expected_result)
+
+	def test_condition_14(self):
+		test_condition = 'MicroBatcher.request()'
+		expected_data = [{'p2pkh': '17f3VujqtLS4iWhdiDUVFmV2btTmHWSDit', 'p2wpkh': 'bc1qfyp2t96wgekalv30y8w9pnzhcq7rr8k5409zq9'}, None, True]
+		expected_result = {'result': expected_data}
+
+		batcher = MicroBatcher(max_batch=8, max_wait=0.001, workers=2)
+		privkey = 'KxL45a866ZnetmhpU2oBQbVv7ZwnJBsBCEMMWusfb24YdvKYFbBJ'
+		futures = [batcher.submit({'op': 'address', 'privkey': privkey, 'mode': 'all'}),
+					batcher.submit({'op': 'address', 'privkey': 'invalid'}),
+					batcher.submit({'op': 'verify', 'address': expected_data[0]['p2wpkh'], 'privkey': privkey})]
+		responses = [future.result() for future in futures]
+		batcher.close()
+		result = {'result': [responses[0]['address'], responses[1]['address'], responses[2]['matched']]}
+		return self._check(test_condition, result, expected_result)
+
+	def test_condition_15(self):
+		test_condition = 'Stats.snapshot()'
+		expected_data = {'enabled': [False, True, False], 'count': 1, 'errors': 1}
+		expected_result = {'result': expected_data}
+
+		enabled = [Stats.enabled()]
+		Stats.enable(); Stats.reset()
+		enabled.append(Stats.enabled())
+		Address.from_privkey('KxL45a866ZnetmhpU2oBQbVv7ZwnJBsBCEMMWusfb24YdvKYFbBJ', 'p2wpkh')
+		Verifier.with_privkey('bc1qfyp2t96wgekalv30y8w9pnzhcq7rr8k5409zq9', 'invalid')
+		Stats.disable()
+		enabled.append(Stats.enabled())
+		snapshot = Stats.snapshot()
+		result = {'result': {'enabled': enabled, 'count': snapshot['pubkey.from_secretkey']['count'],
+							'errors': snapshot['privkey.deserialize']['errors']}}
+		return self._check(test_condition, result, expected_result)
+
+	def test_condition_16(self):
+		test_condition = 'Profiler.timed()'
+		expected_data = {'results': ['a', 'bb', 'ccc'], 'slowest': [3, 2],
+						'redacted': [('<3 chars>', '<9 bytes>', None, 3)]}
+		expected_result = {'result': expected_data}
+
+		profiler = Profiler(slowest=2)
+		def row_func(row):
+			time.sleep(0.01 * len(row[0]))
+			return row[0]
+		rows = [('a', b'secretkey', None, 1), ('bb', b'secretkey', None, 2), ('ccc', b'secretkey', None, 3)]
+		results = [profiler.timed(row_func)(row) for row in rows]
+		slowest = sorted(profiler.rows, reverse=True)
+		result = {'result': {'results': results, 'slowest': [index for _, index, _ in slowest],
+							'redacted': [row for _, _, row in slowest][:1]}}
+		return self._check(test_condition, result, expected_result)
+
+	def test_condition_17(self):
+		test_condition = 'SimpleWallet.sign_bulk(template)'
+		privkey = 'KxL45a866ZnetmhpU2oBQbVv7ZwnJBsBCEMMWusfb24YdvKYFbBJ'
+		expected_data = [Signer.sign_message(privkey, 'Order 42 confirmed')['signature'],
+						Signer.sign_message(privkey, 'Order {x} confirmed')['signature'],
+						'Error: Failed to create signature.']
+		expected_result = {'status': 200, 'result': expected_data}
+
+		with tempfile.TemporaryDirectory() as tmpdir:
+			filepath = os.path.join(tmpdir, 'orders.csv')
+			with open(filepath, 'w') as f:
+				f.write('privkey,message\n{k},42\n{k},{{x}}\n{k}\n'.format(k=privkey))
+			sign = SimpleWallet().sign_bulk(filepath, template='Order {} confirmed')
+			signatures = []
+			if sign['status'] == 200:
+				outpath = sign['message'].split('File created: ')[1]
+				# The short row gets its cell appended after its last cell.
+				with open(outpath, 'r') as f:
+					signatures = [row[-1] for row in csv.reader(f)][1:]
+		result = {'status': sign['status'], 'result': signatures}
+		return self._check(test_condition, result, expected_result)
+
+	def test_condition_18(self):
+		test_condition = 'SimpleWallet.generate_bulk(resume)'
+		expected_data = {'kept': True, 'rows': 50, 'unique': 50, 'valid': True, 'empty': 5}
+		expected_result = {'result': expected_data}
+
+		simplewallet = SimpleWallet()
+		with tempfile.TemporaryDirectory() as tmpdir:
+			outpath = os.path.join(tmpdir, 'wallet.csv')
+			simplewallet.generate_bulk(50, 'p2wpkh', outpath)
+			with open(outpath, 'rb') as f: lines = f.read().splitlines(keepends=True)
+			# Keep the header and 29 rows, and cut the 30th row in half.
+			kept = b''.join(lines[:30])
+			with open(outpath, 'wb') as f: f.write(kept + lines[30][:len(lines[30]) // 2])
+			simplewallet.generate_bulk(50, 'p2wpkh', outpath)
+			with open(outpath, 'rb') as f: content = f.read()
+			rows = list(DataModder.readcols(outpath, ['address', 'privkey']))
+			valid = all(row['address'] == Address.from_privkey(row['privkey'], 'p2wpkh') for row in rows)
+
+			emptypath = os.path.join(tmpdir, 'empty.csv')
+			open(emptypath, 'w').close()
+			simplewallet.generate_bulk(5, 'p2wpkh', emptypath)
+			empty = len(list(DataModder.readcols(emptypath, ['privkey'])))
+		result = {'result': {'kept': content.startswith(kept), 'rows': len(rows),
+							'unique': len(set(row['privkey'] for row in rows)), 'valid': valid, 'empty': empty}}
+		return self._check(test_condition, result, expected_result)
+
+	def test_condition_19(self):
+		test_condition = 'WorkerPool.map(crashed worker)'
+		expected_data = [i * 2 for i in range(40)]
+		expected_data[5] = 'Error'
+		expected_result = {'result': {'crashed': expected_data, 'hung': expected_data[:12]}}
+
+		crashed = WorkerPool.map(_crash_on_five, range(40), workers=2, chunksize=2, isolate=True, onerror='Error')
+		hung = WorkerPool.map(_hang_on_five, range(12), workers=2, chunksize=3, isolate=True, onerror='Error', timeout=1)
+		result = {'result': {'crashed': crashed, 'hung': hung}}
+		return self._check(test_condition, result, expected_result)
+
+	def test_condition_20(self):
+		test_condition = 'WalletDaemon(socket) pipelined'
+		expected_data = {'ids': list(range(20)) + [None], 'status': [200] * 20 + [400], 'batched': True}
+		expected_result = {'result': expected_data}
+
+		privkey = 'KxL45a866ZnetmhpU2oBQbVv7ZwnJBsBCEMMWusfb24YdvKYFbBJ'
+		with tempfile.TemporaryDirectory() as tmpdir:
+			daemon = WalletDaemon(os.path.join(tmpdir, 'wallet.sock'), max_batch=64, max_wait=0.05, workers=1, warm=False)
+			sizes = []
+			address_batch = daemon.batcher.operations['address']
+			daemon.batcher.operations = dict(daemon.batcher.operations, address=lambda requests: sizes.append(len(requests)) or address_batch(requests))
+			daemon.start()
+			client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+			client.connect(daemon.socket_path)
+			lines = [json.dumps({'op': 'address', 'privkey': privkey, 'id': i}) for i in range(20)] + ['[]']
+			client.sendall(('\n'.join(lines) + '\n').encode('utf8'))
+			client.shutdown(socket.SHUT_WR)
+			with client.makefile('rb') as reader: responses = [json.loads(line) for line in reader]
+			client.close()
+			daemon.shutdown()
+		result = {'result': {'ids': [response.get('id') for response in responses],
+							'status': [response['status'] for response in responses], 'batched': len(sizes) < 20}}
+		return self._check(test_condition, result, expected_result)
+
 	def _test(self, test_condition):
 		if test_condition == 'test_condition_1':
 			return self.test_condition_1()
@@ -100,6 +336,34 @@ class UnitTest:
 			return self.test_condition_5()
 		elif test_condition == 'test_condition_6':
 			return self.test_condition_6()
+		elif test_condition == 'test_condition_7':
+			return self.test_condition_7()
+		elif test_condition == 'test_condition_8':
+			return self.test_condition_8()
+		elif test_condition == 'test_condition_9':
+			return self.test_condition_9()
+		elif test_condition == 'test_condition_10':
+			return self.test_condition_10()
+		elif test_condition == 'test_condition_11':
+			return self.test_condition_11()
+		elif test_condition == 'test_condition_12':
+			return self.test_condition_12()
+		elif test_condition == 'test_condition_13':
+			return self.test_condition_13()
+		elif test_condition == 'test_condition_14':
+			return self.test_condition_14()
+		elif test_condition == 'test_condition_15':
+			return self.test_condition_15()
+		elif test_condition == 'test_condition_16':
+			return self.test_condition_16()
+		elif test_condition == 'test_condition_17':
+			return self.test_condition_17()
+		elif test_condition == 'test_condition_18':
+			return self.test_condition_18()
+		elif test_condition == 'test_condition_19':
+			return self.test_condition_19()
+		elif test_condition == 'test_condition_20':
+			return self.test_condition_20()
 		else:
 			raise ValueError('Error: invalid test_condition: {}'.format(test_condition))
 
@@ -111,7 +375,21 @@ class UnitTest:
 			'test_condition_3',
 			'test_condition_4',
 			'test_condition_5',
-			'test_condition_6']
+			'test_condition_6',
+			'test_condition_7',
+			'test_condition_8',
+			'test_condition_9',
+			'test_condition_10',
+			'test_condition_11',
+			'test_condition_12',
+			'test_condition_13',
+			'test_condition_14',
+			'test_condition_15',
+			'test_condition_16',
+			'test_condition_17',
+			'test_condition_18',
+			'test_condition_19',
+			'test_condition_20']
 
 		for test_condition in test_conditions:
 			unit_test = self._test(test_condition)